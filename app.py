@@ -407,7 +407,7 @@ if is_authenticated:
         st.write("This is the admin dashboard. Only administrators can access this page.")
 
         # Create tabs for different admin functions
-        user_tab, database_tab = st.tabs(["User Management", "Database Viewer"])
+        user_tab, database_tab, performance_tab = st.tabs(["User Management", "Database Viewer", "Performance"])
 
         with user_tab:
             st.subheader("User Management")
@@ -568,4 +568,36 @@ if is_authenticated:
                 except Exception as e:
                     st.error(f"Error reading database file: {e}")
             else:
-                st.warning(f"Database file '{db_file}' not found.") 
\ No newline at end of file
+                st.warning(f"Database file '{db_file}' not found.") 
+
+        with performance_tab:
+            st.subheader("Prediction Cache")
+
+            from predict_page import prediction_cache
+            from model_store import get_model_store
+
+            cache_stats = prediction_cache.stats()
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Entries", f"{cache_stats['entries']:,} / {cache_stats['max_entries']:,}")
+            col2.metric("Hit Rate", f"{cache_stats['hit_rate']:.1%}")
+            col3.metric("Hits / Misses", f"{cache_stats['hits']:,} / {cache_stats['misses']:,}")
+            col4.metric("Evictions", f"{cache_stats['evictions']:,}")
+            st.caption(f"Model version: {get_model_store().version or 'not loaded yet'}")
+
+            st.subheader("Explore Chart Cache")
+
+            from explore_page import chart_cache, chart_render_stats
+
+            chart_stats = chart_cache.stats()
+            renders = chart_render_stats["renders"]
+            mean_render_ms = chart_render_stats["render_seconds"] / renders * 1000 if renders else 0.0
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Hit Rate", f"{chart_stats['hit_rate']:.1%}")
+            col2.metric("Renders", f"{renders:,}")
+            col3.metric("Mean Render Time", f"{mean_render_ms:.0f} ms")
+
+            from explore_page import histogram_cache
+
+            histogram_stats = histogram_cache.stats()
+            st.caption(f"Salary histogram cache: {histogram_stats['entries']:,} filter combinations, "
+                       f"hit rate {histogram_stats['hit_rate']:.1%}")
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+Filter latency of the Explore page's bitmap index on a synthetic survey.
+
+    python benchmarks/bench_filter_index.py [n_rows]
+
+Builds a synthetic cleaned survey (10M rows by default), then times the
+FilterIndex against plain boolean masking of the DataFrame for a few filter
+combinations, and checks that both select the same rows.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import best_of, synthetic_survey  # noqa: E402
+from filter_index import FilterIndex  # noqa: E402
+
+CASES = [
+    ("one country", {"Country": ["Germany"]}, {}),
+    ("3 countries + education", {"Country": ["Germany", "France", "Spain"], "EdLevel": ["Master’s degree"]}, {}),
+    ("experience 5-10", {}, {"YearsCodePro": (5, 10)}),
+    ("all three filters", {"Country": ["United States", "India"], "EdLevel": ["Bachelor’s degree", "Post grad"]},
+     {"YearsCodePro": (2, 15)}),
+]
+
+
+def boolean_mask(df, categories, ranges):
+    mask = np.ones(len(df), dtype=bool)
+    for column, selected in categories.items():
+        mask &= df[column].isin(selected).to_numpy()
+    for column, (low, high) in ranges.items():
+        mask &= df[column].between(low, high).to_numpy()
+    return mask
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    df = synthetic_survey(n, categorical=True)
+    print(f"{n:,} synthetic rows")
+
+    start = time.perf_counter()
+    index = FilterIndex(df)
+    print(f"Index build: {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"{sum(b.nbytes for bitmaps in index.bitmaps.values() for b in bitmaps.values()) / 1e6:.1f} MB of bitmaps")
+
+    for name, categories, ranges in CASES:
+        mask, index_time = best_of(lambda: index.select(categories, ranges))
+        expected, pandas_time = best_of(lambda: boolean_mask(df, categories, ranges))
+        if not np.array_equal(np.unpackbits(mask, count=n).astype(bool), expected):
+            raise SystemExit(f"FAIL: {name} selects different rows")
+        print(f"{name:<26} bitmap {index_time * 1000:8.2f} ms   boolean mask {pandas_time * 1000:8.2f} ms   "
+              f"{int(expected.sum()):>10,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Memory report for the Explore page's in-memory survey.
+
+    python benchmarks/bench_memory.py [year ...]
+
+Loads the cleaned survey as stored on disk and in its compact form, and
+reports bytes per row of the frame and of its FilterIndex. Fails if any
+Explore aggregate (counts, mean salary by country and by experience) changes.
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from filter_index import FilterIndex  # noqa: E402
+from survey_data import DEFAULT_YEAR, compact_frame, load_clean_survey  # noqa: E402
+
+
+def index_bytes(index):
+    arrays = [index.values, index.value_bins]
+    arrays += list(index.codes.values())
+    arrays += [bitmap for bitmaps in index.bitmaps.values() for bitmap in bitmaps.values()]
+    arrays += list(index.sorted_rows.values()) + list(index.sorted_values.values())
+    return sum(array.nbytes for array in arrays)
+
+
+def main():
+    years = tuple(int(year) for year in sys.argv[1:]) or (DEFAULT_YEAR,)
+    original = load_clean_survey(years, compact=False)
+    compact = compact_frame(original)
+    n = len(original)
+    print(f"{n:,} rows for {', '.join(map(str, years))}")
+
+    before = original.memory_usage(deep=True).sum()
+    after = compact.memory_usage(deep=True).sum()
+    print(f"Frame        {before / n:8.1f} -> {after / n:8.1f} bytes/row   ({before / 1e6:.1f} -> {after / 1e6:.1f} MB)")
+    for column in compact.columns:
+        print(f"  {column:<12} {str(original[column].dtype):>10} -> {str(compact[column].dtype):<10}"
+              f"{original[column].memory_usage(deep=True, index=False) / n:8.1f} -> "
+              f"{compact[column].memory_usage(deep=True, index=False) / n:6.1f} bytes/row")
+
+    original_index, compact_index = FilterIndex(original), FilterIndex(compact)
+    before, after = index_bytes(original_index), index_bytes(compact_index)
+    print(f"FilterIndex  {before / n:8.1f} -> {after / n:8.1f} bytes/row")
+
+    failed = False
+    checks = [
+        ("country counts", lambda df, index: df["Country"].value_counts().sort_index().to_numpy()),
+        ("mean by country", lambda df, index: index.group_stats("Country")["mean"].to_numpy()),
+        ("mean by experience", lambda df, index: index.group_stats("YearsCodePro")["mean"].to_numpy()),
+    ]
+    for name, aggregate in checks:
+        same = np.array_equal(aggregate(original, original_index), aggregate(compact, compact_index))
+        failed |= not same
+        print(f"{name:<20} {'unchanged' if same else 'CHANGED'}")
+    if failed:
+        raise SystemExit("FAIL: the compact frame changes an Explore aggregate")
+
+
+if __name__ == "__main__":
+    main()
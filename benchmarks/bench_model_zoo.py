@@ -0,0 +1,135 @@
+"""
+Model zoo benchmark: serving cost and holdout accuracy side by side.
+
+    python benchmarks/bench_model_zoo.py [--year 2020 ...] [--models tree hist_gbm ...] [--output zoo.json]
+
+Trains every candidate on the same 80% of the cleaned survey and reports fit
+time, single-row and 10k-row batch predict latency, pickled size, peak RSS
+growth of the fitting process and RMSE on the held-out 20% (training RMSE
+alongside, to show overfitting). Models on the latency / accuracy frontier are starred.
+Each model runs in a fresh process so peak memory is its own. Results are
+written to benchmarks/results/zoo-<timestamp>-<commit>.json.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeRegressor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from bench_predict import RESULTS_DIR, git_commit, measure  # noqa: E402
+from survey_data import DEFAULT_YEAR, load_clean_survey, peak_rss_mb  # noqa: E402
+from train import RANDOM_STATE, encode  # noqa: E402
+
+# Candidates, from the notebook's three models to the serving-sized ones
+MODELS = {
+    "linear": lambda: LinearRegression(),
+    "tree": lambda: DecisionTreeRegressor(random_state=RANDOM_STATE),
+    "tree_depth10": lambda: DecisionTreeRegressor(max_depth=10, random_state=RANDOM_STATE),
+    "forest": lambda: RandomForestRegressor(random_state=RANDOM_STATE),
+    # Size-capped forest: few, bounded trees
+    "forest_capped": lambda: RandomForestRegressor(n_estimators=20, max_leaf_nodes=256, random_state=RANDOM_STATE),
+    "hist_gbm": lambda: HistGradientBoostingRegressor(random_state=RANDOM_STATE),
+}
+HOLDOUT = 0.2
+BATCH_ROWS = 10_000
+
+
+def rmse(model, X, y):
+    return float(np.sqrt(np.mean((model.predict(X) - y) ** 2)))
+
+
+def benchmark_model(name, X_train, y_train, X_test, y_test):
+    """Every measurement of one model; runs in its own process"""
+    baseline_mb = peak_rss_mb()
+    model = MODELS[name]()
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    fit_peak_mb = peak_rss_mb()
+
+    row = X_test[:1]
+    batch = X_test[np.arange(BATCH_ROWS) % len(X_test)]
+    single = measure(lambda: model.predict(row), repeat=200, warmup=5)
+    batched = measure(lambda: model.predict(batch), repeat=10, rows=len(batch))
+    return {
+        "fit_s": fit_seconds,
+        "single_p50_ms": single["p50_ms"],
+        "single_p99_ms": single["p99_ms"],
+        "batch_us_per_row": batched["p50_ms"] * 1000 / len(batch),
+        "size_mb": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) / 1e6,
+        "baseline_rss_mb": baseline_mb,
+        "fit_peak_rss_mb": fit_peak_mb,
+        "fit_rss_growth_mb": fit_peak_mb - baseline_mb,
+        "train_rmse": rmse(model, X_train, y_train),
+        "holdout_rmse": rmse(model, X_test, y_test),
+    }
+
+
+def frontier(results):
+    """Models no other model beats on both single-row latency and holdout RMSE"""
+    return {
+        name for name, stats in results.items()
+        if not any(other["single_p50_ms"] <= stats["single_p50_ms"] and other["holdout_rmse"] < stats["holdout_rmse"]
+                   for other_name, other in results.items() if other_name != name)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--year", type=int, nargs="+", default=[DEFAULT_YEAR])
+    parser.add_argument("--models", nargs="+", choices=list(MODELS), default=list(MODELS))
+    parser.add_argument("--output", default=None, help="where to write the JSON results")
+    args = parser.parse_args()
+
+    years = tuple(sorted(set(args.year)))
+    encoded = encode(load_clean_survey(years, compact=False))
+    X_train, X_test, y_train, y_test = train_test_split(encoded["X"], encoded["y"], test_size=HOLDOUT,
+                                                        random_state=RANDOM_STATE)
+    print(f"{len(y_train):,} training rows, {len(y_test):,} holdout rows")
+
+    results = {}
+    # A fresh spawned worker per model, so ru_maxrss is not shared between models
+    context = multiprocessing.get_context("spawn")
+    for name in args.models:
+        with ProcessPoolExecutor(1, mp_context=context) as pool:
+            results[name] = pool.submit(benchmark_model, name, X_train, y_train, X_test, y_test).result()
+
+    best = frontier(results)
+    print(f"{'model':<16}{'fit s':>8}{'1 row ms':>10}{'p99 ms':>9}{'µs/row':>9}{'size MB':>9}"
+          f"{'fit +MB':>9}{'train RMSE':>12}{'holdout RMSE':>14}")
+    for name, stats in results.items():
+        print(f"{name:<16}{stats['fit_s']:>8.2f}{stats['single_p50_ms']:>10.3f}{stats['single_p99_ms']:>9.3f}"
+              f"{stats['batch_us_per_row']:>9.2f}{stats['size_mb']:>9.2f}{stats['fit_rss_growth_mb']:>9.0f}"
+              f"{stats['train_rmse']:>12,.0f}{stats['holdout_rmse']:>14,.0f}{'  *' if name in best else ''}")
+    print("* on the single-row latency / holdout RMSE frontier")
+
+    commit = git_commit()
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"zoo-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "created_at": datetime.now().isoformat(),
+            "years": list(years),
+            "rows": {"train": len(y_train), "holdout": len(y_test)},
+            "frontier": sorted(best),
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
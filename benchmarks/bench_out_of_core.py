@@ -0,0 +1,98 @@
+"""
+Out-of-core training against the in-memory tree on a common holdout.
+
+    python benchmarks/bench_out_of_core.py [n_rows]
+
+Writes a synthetic cleaned survey (2M rows by default) to Parquet, holds out
+one fold, and trains the same max_depth grid two ways: streaming the file
+into per-cell statistics (out_of_core) and on the materialized rows as the
+notebook does. Reports fit time, peak traced memory and holdout RMSE of both,
+and fails if the out-of-core tree is less accurate.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+from sklearn.tree import DecisionTreeRegressor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import synthetic_survey  # noqa: E402
+from out_of_core import (aggregate, cells_of, fit_cells, fit_encoders, row_folds,  # noqa: E402
+                         search_cells, squared_error)
+
+MAX_DEPTH = [2, 4, 6, 8, 10, 12]
+HOLDOUT_FOLD = 0
+# The trees make the same splits; allow only float rounding between them
+TOLERANCE = 1e-6
+
+
+def traced(func):
+    """Result, seconds and peak traced memory (MB) of func()"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def out_of_core(path):
+    stats = aggregate([path])
+    stats = stats[stats.index.get_level_values("Fold") != HOLDOUT_FOLD]
+    le_country, le_education = fit_encoders(stats)
+    searched = search_cells(stats, le_country, le_education, MAX_DEPTH)
+    model = fit_cells(cells_of(stats), le_country, le_education, searched["best_params"])
+    return model, le_country, le_education, searched["best_params"]
+
+
+def in_memory(path):
+    # The notebook's approach: every row in memory, the same folds for the search
+    df = pd.read_parquet(path)
+    folds = row_folds(np.arange(len(df)))
+    df, folds = df[folds != HOLDOUT_FOLD], folds[folds != HOLDOUT_FOLD]
+    le_country, le_education = LabelEncoder(), LabelEncoder()
+    X = np.column_stack([le_country.fit_transform(df["Country"]), le_education.fit_transform(df["EdLevel"]),
+                         df["YearsCodePro"].to_numpy(dtype=float)])
+    y = df["Salary"].to_numpy(dtype=float)
+    scores = {}
+    for depth in MAX_DEPTH:
+        error = 0.0
+        for fold in np.unique(folds):
+            model = DecisionTreeRegressor(max_depth=depth, random_state=0).fit(X[folds != fold], y[folds != fold])
+            error += ((model.predict(X[folds == fold]) - y[folds == fold]) ** 2).sum()
+        scores[depth] = error
+    best = min(scores, key=scores.get)
+    model = DecisionTreeRegressor(max_depth=best, random_state=0).fit(X, y)
+    return model, le_country, le_education, {"max_depth": best}
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "clean.parquet")
+        synthetic_survey(n).to_parquet(path, index=False, row_group_size=100_000)
+        print(f"{n:,} synthetic rows, holdout fold {HOLDOUT_FOLD}")
+
+        # Holdout rows scored through their cell statistics, the same for both models
+        holdout = cells_of(aggregate([path]), folds=[HOLDOUT_FOLD])
+        n_holdout = holdout["count"].sum()
+
+        rmse = {}
+        for name, train in [("out-of-core", out_of_core), ("in-memory", in_memory)]:
+            (model, le_country, le_education, params), seconds, peak = traced(lambda: train(path))
+            rmse[name] = np.sqrt(squared_error(model, holdout, le_country, le_education) / n_holdout)
+            print(f"{name:<12} {seconds:7.2f} s   peak {peak:8.1f} MB   {params}   "
+                  f"holdout RMSE ${rmse[name]:,.2f}")
+
+    if rmse["out-of-core"] > rmse["in-memory"] * (1 + TOLERANCE):
+        raise SystemExit("FAIL: the out-of-core tree is less accurate than the in-memory tree")
+
+
+if __name__ == "__main__":
+    main()
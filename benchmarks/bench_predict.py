@@ -0,0 +1,141 @@
+"""
+Latency benchmark for the prediction path.
+
+    python benchmarks/bench_predict.py [--model saved_steps.pkl] [--compare previous.json]
+
+Times model load, the single-row path used by show_predict_page (dense table
+hit and off-grid model call), and encode + predict over batches of
+1 / 100 / 10k / 1M rows. Reports p50 / p95 / p99 and throughput and writes the
+results to benchmarks/results/<timestamp>-<commit>.json. With --compare, the
+p50 of every case is printed next to the earlier run.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from salary_model import Predictor, load_model, model_artifact  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+BATCH_SIZES = [1, 100, 10_000, 1_000_000]
+
+# Models fitted on a DataFrame warn on every ndarray predict
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def summarize(timings, rows=1):
+    """Percentiles in milliseconds plus rows/s at the median"""
+    timings = np.asarray(timings)
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return {
+        "runs": len(timings),
+        "rows": rows,
+        "p50_ms": p50 * 1000,
+        "p95_ms": p95 * 1000,
+        "p99_ms": p99 * 1000,
+        "rows_per_s": rows / p50 if p50 > 0 else float("inf"),
+    }
+
+
+def measure(func, repeat, rows=1, warmup=1):
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings, rows)
+
+
+def random_frame(predictor, n, seed=0):
+    """Random raw rows, as the batch upload or API would receive them"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Country": rng.choice(list(predictor.country_codes), n),
+        "EdLevel": rng.choice(list(predictor.education_codes), n),
+        "YearsCodePro": rng.choice(np.append(np.arange(51), 0.5), n),
+    })
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(model_path):
+    results = {}
+    results["load_model"] = measure(lambda: load_model(model_path), repeat=10, warmup=0)
+    results["build_predictor"] = measure(lambda: Predictor(load_model(model_path)), repeat=10, warmup=0)
+
+    predictor = Predictor(load_model(model_path))
+    country = next(iter(predictor.country_codes))
+    education = next(iter(predictor.education_codes))
+    results["single_table_hit"] = measure(lambda: predictor.predict(country, education, 3), repeat=10_000)
+    results["single_off_grid"] = measure(lambda: predictor.predict(country, education, 0.5), repeat=2_000)
+
+    for size in BATCH_SIZES:
+        frame = random_frame(predictor, size, seed=size)
+        repeat = 200 if size <= 100 else 20 if size <= 10_000 else 5
+        results[f"batch_{size}"] = measure(lambda: predictor.predict_frame(frame), repeat=repeat, rows=size)
+    return results
+
+
+def print_results(results, previous=None):
+    print(f"{'case':<20}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}{'rows/s':>16}{'prev p50':>12}")
+    for name, stats in results.items():
+        line = (f"{name:<20}{stats['p50_ms']:>12.4f}{stats['p95_ms']:>12.4f}"
+                f"{stats['p99_ms']:>12.4f}{stats['rows_per_s']:>16,.0f}")
+        if previous and name in previous:
+            line += f"{previous[name]['p50_ms']:>12.4f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=None, help="model artifact (default: bundle if present, else pickle)")
+    parser.add_argument("--output", default=None, help="where to write the JSON results")
+    parser.add_argument("--compare", default=None, help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    model_path = args.model or model_artifact()
+    results = run(model_path)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            previous = json.load(f)["results"]
+    print_results(results, previous)
+
+    commit = git_commit()
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "created_at": datetime.now().isoformat(),
+            "model": model_path,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Check the vectorized preprocessing against the original row-by-row code and time both.
+
+    python benchmarks/bench_preprocessing.py [survey_results_public.csv] [--check]
+
+Fails if any cleaned value differs, then reports the time of each step on the
+full survey. The repo has no test suite, so this doubles as the equivalence
+check: --check runs every comparison once, on a built-in set of edge-case
+answers plus the survey when it is present, without the timing repeats.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing import clean_education, clean_experience, shorten_categories  # noqa: E402
+from survey_data import SURVEY_COLUMNS, SURVEY_FILE  # noqa: E402
+
+
+# Row-by-row reference implementations, as originally written in the notebook
+def shorten_categories_rowwise(categories, cutoff):
+    categorical_map = {}
+    for i in range(len(categories)):
+        if categories.values[i] >= cutoff:
+            categorical_map[categories.index[i]] = categories.index[i]
+        else:
+            categorical_map[categories.index[i]] = 'Other'
+    return categorical_map
+
+
+def clean_experience_rowwise(x):
+    if x ==  'More than 50 years':
+        return 50
+    if x == 'Less than 1 year':
+        return 0.5
+    return float(x)
+
+
+def clean_education_rowwise(x):
+    if 'Bachelor’s degree' in x:
+        return 'Bachelor’s degree'
+    if 'Master’s degree' in x:
+        return 'Master’s degree'
+    if 'Professional degree' in x or 'Other doctoral' in x:
+        return 'Post grad'
+    return 'Less than a Bachelors'
+
+
+# Every special-cased answer, next to ordinary ones
+EDGE_CASES = pd.DataFrame({
+    "Country": ["Germany"] * 3 + ["France"] * 2 + ["Malta"],
+    "YearsCodePro": ["Less than 1 year", "More than 50 years", "1", "12", "50", "3"],
+    "EdLevel": [
+        "Bachelor’s degree (B.A., B.S., B.Eng., etc.)",
+        "Master’s degree (M.A., M.S., M.Eng., MBA, etc.)",
+        "Professional degree (JD, MD, etc.)",
+        "Other doctoral degree (Ph.D., Ed.D., etc.)",
+        "Some college/university study without earning a degree",
+        "Primary/elementary school",
+    ],
+})
+
+
+def timed(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def compare(df, cutoff, repeat):
+    """True if every vectorized step matches its row-wise reference on df"""
+    cases = [
+        ("shorten_categories",
+         lambda: shorten_categories_rowwise(df["Country"].value_counts(), cutoff),
+         lambda: shorten_categories(df["Country"].value_counts(), cutoff)),
+        ("clean_experience",
+         lambda: df["YearsCodePro"].apply(clean_experience_rowwise),
+         lambda: clean_experience(df["YearsCodePro"])),
+        ("clean_education",
+         lambda: df["EdLevel"].apply(clean_education_rowwise),
+         lambda: clean_education(df["EdLevel"])),
+    ]
+
+    failed = False
+    for name, rowwise, vectorized in cases:
+        expected, rowwise_time = timed(rowwise, repeat)
+        actual, vectorized_time = timed(vectorized, repeat)
+        if isinstance(expected, dict):
+            same = expected == actual
+        else:
+            same = expected.astype(actual.dtype).equals(actual)
+        failed |= not same
+        print(f"{name:<20} {'OK  ' if same else 'FAIL'} row-wise {rowwise_time * 1000:9.2f} ms   "
+              f"vectorized {vectorized_time * 1000:9.2f} ms   {rowwise_time / vectorized_time:6.1f}x")
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("csv", nargs="?", default=SURVEY_FILE)
+    parser.add_argument("--check", action="store_true", help="compare once, without timing repeats")
+    args = parser.parse_args()
+    repeat = 1 if args.check else 5
+
+    print(f"{len(EDGE_CASES)} edge-case answers")
+    failed = not compare(EDGE_CASES, 2, 1)
+    if os.path.exists(args.csv):
+        df = pd.read_csv(args.csv, usecols=SURVEY_COLUMNS).dropna()
+        print(f"{len(df):,} rows from {args.csv}")
+        failed |= not compare(df, 400, repeat)
+    elif not args.check:
+        raise SystemExit(f"Survey file {args.csv} not found")
+
+    if failed:
+        raise SystemExit("FAIL: vectorized preprocessing differs from the row-wise version")
+
+
+if __name__ == "__main__":
+    main()
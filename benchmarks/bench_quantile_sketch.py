@@ -0,0 +1,72 @@
+"""
+Accuracy of the mergeable salary quantile sketches against exact quantiles.
+
+    python benchmarks/bench_quantile_sketch.py [n_rows]
+
+Streams a synthetic survey (1M rows by default) through per-group KLL sketches
+in chunks, merges them as ingestion does across chunks, years and worker
+processes (via a serialization round-trip), and compares the median and p90
+per country and per experience with np.quantile. Fails if any estimate is
+off by more than MAX_RANK_ERROR in rank.
+"""
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import synthetic_survey  # noqa: E402
+from quantile_sketch import SKETCH_QUANTILES, GroupSketches  # noqa: E402
+
+CHUNK_SIZE = 100_000
+# Fraction of the group's rows between the estimate and the true quantile
+MAX_RANK_ERROR = 0.02
+
+
+def build(df, parts):
+    """Sketch each of parts slices chunk by chunk, serialize it, then merge the slices"""
+    merged = GroupSketches()
+    for part in np.array_split(np.arange(len(df)), parts):
+        sketches = GroupSketches()
+        for start in range(0, len(part), CHUNK_SIZE):
+            sketches.update(df.iloc[part[start:start + CHUNK_SIZE]])
+        merged.merge(GroupSketches.from_dict(json.loads(json.dumps(sketches.to_dict()))))
+    return merged
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = synthetic_survey(n)
+    print(f"{n:,} synthetic rows")
+
+    start = time.perf_counter()
+    sketches = build(df, parts=4)
+    elapsed = time.perf_counter() - start
+    size = len(json.dumps(sketches.to_dict()))
+    print(f"Sketch build: {elapsed:.2f} s ({n / elapsed:,.0f} rows/s), {size / 1e3:.0f} kB serialized")
+
+    worst = 0.0
+    for column in sketches.by:
+        estimates = sketches.quantiles(column)
+        for key, values in df.groupby(df[column].astype(str))["Salary"]:
+            values = np.sort(values.to_numpy())
+            for q in SKETCH_QUANTILES:
+                estimate = estimates.loc[key, f"p{int(q * 100)}"]
+                # Rank interval of the estimate vs the target rank
+                low = np.searchsorted(values, estimate, side="left") / len(values)
+                high = np.searchsorted(values, estimate, side="right") / len(values)
+                error = max(low - q, q - high, 0.0)
+                worst = max(worst, error)
+                if error > MAX_RANK_ERROR:
+                    raise SystemExit(f"FAIL: {column}={key} p{int(q * 100)} is {estimate:,.0f}, "
+                                     f"exact {np.quantile(values, q):,.0f} (rank error {error:.3%})")
+        exact = df.groupby(df[column].astype(str))["Salary"].median()
+        relative = (estimates["p50"] / exact.loc[estimates.index] - 1).abs().max()
+        print(f"{column:<14} {len(estimates):>3} groups   max median error {relative:.2%}")
+    print(f"Worst rank error {worst:.3%} (limit {MAX_RANK_ERROR:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Check that the halving search's wall-clock budget holds until the process exits.
+
+    python benchmarks/bench_search_budget.py [--budget 3] [--rows 400000]
+
+Runs a budgeted search in a fresh interpreter over every tree and forest
+candidate on all rows, where the forests cannot finish in time. Fails if the
+interpreter, fits still running included, exits more than SLACK seconds
+after the budget runs out.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Seconds allowed between the end of the budget and the interpreter exiting
+SLACK = 1.0
+
+SEARCH = """
+import os
+import sys
+import time
+sys.path.insert(0, {root!r})
+sys.path.insert(0, os.path.join({root!r}, "benchmarks"))
+from common import synthetic_survey
+from model_search import candidates, successive_halving
+from train import encode
+
+encoded = encode(synthetic_survey({rows}))
+print(time.time(), flush=True)
+result = successive_halving(encoded["X"], encoded["y"], candidates(["tree", "forest"]), min_resources={rows},
+                            budget={budget}, n_jobs={jobs})
+print(f"search returned after {{result['seconds']:.2f}} s, timed out: {{result['timed_out']}}")
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget", type=float, default=3.0)
+    parser.add_argument("--rows", type=int, default=400_000)
+    parser.add_argument("--jobs", type=int, default=2)
+    args = parser.parse_args()
+
+    # Every candidate on every row, so the budget stops forests mid-fit
+    code = SEARCH.format(root=ROOT, rows=args.rows, budget=args.budget, jobs=args.jobs)
+    completed = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True)
+    # The child prints when the search starts, so imports and data generation are not counted
+    lines = completed.stdout.splitlines()
+    seconds = time.time() - float(lines[0])
+    print("\n".join(lines[1:]))
+    print(f"process exited {seconds:.2f} s after the search started, with a budget of {args.budget} s")
+
+    if seconds > args.budget + SLACK:
+        raise SystemExit(f"FAIL: the search outlived its {args.budget} s budget by {seconds - args.budget:.1f} s")
+    if completed.returncode:
+        raise SystemExit(f"FAIL: the search exited with code {completed.returncode}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Check the prediction service's request isolation and time its micro-batching.
+
+    python benchmarks/bench_service.py [--model saved_model] [--requests 1000]
+
+Drives the ASGI app in process. Every kind of invalid row is sent together
+with valid requests, so they land in one micro-batch; fails unless each
+invalid request gets a 400 and every valid one a 200. Then reports the
+throughput of concurrent single-row requests.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Models fitted on a DataFrame warn on every ndarray predict
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+VALID = 5
+# Rows a caller may send that must be rejected without failing anyone else
+INVALID_ROWS = {
+    "null label": {"Country": None, "EdLevel": "Master’s degree", "YearsCodePro": 5},
+    "unknown label": {"Country": "Atlantis", "EdLevel": "Master’s degree", "YearsCodePro": 5},
+    "not a number": {"YearsCodePro": "many"},
+    "infinite": {"YearsCodePro": 1e400},
+    "negative": {"YearsCodePro": -3},
+}
+
+
+async def call(app, method, path, payload=None):
+    """(status, JSON body) of one request through the ASGI app"""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    received = False
+    messages = []
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app({"type": "http", "method": method, "path": path}, receive, send)
+    return messages[0]["status"], json.loads(messages[1]["body"])
+
+
+async def check_isolation(app, valid_row):
+    failures = []
+    for name, fields in INVALID_ROWS.items():
+        invalid_row = dict(valid_row, **fields)
+        requests = [valid_row] * VALID + [invalid_row]
+        statuses = [status for status, _ in await asyncio.gather(*[call(app, "POST", "/predict", row)
+                                                                   for row in requests])]
+        print(f"{name:<15} valid {statuses[:-1]}  invalid {statuses[-1]}")
+        if statuses != [200] * VALID + [400]:
+            failures.append(name)
+    return failures
+
+
+async def throughput(app, valid_row, n):
+    start = time.perf_counter()
+    responses = await asyncio.gather(*[call(app, "POST", "/predict", valid_row) for _ in range(n)])
+    seconds = time.perf_counter() - start
+    if any(status != 200 for status, _ in responses):
+        raise SystemExit("FAIL: a valid request was not served")
+    print(f"{n:,} concurrent single-row requests in {seconds:.2f} s ({n / seconds:,.0f} requests/s)")
+
+
+async def run(args):
+    import prediction_service
+
+    batcher = prediction_service.get_batcher()
+    predictor = batcher.store.get()
+    valid_row = {"Country": next(iter(predictor.country_codes)), "EdLevel": next(iter(predictor.education_codes)),
+                 "YearsCodePro": 5}
+    failures = await check_isolation(prediction_service.app, valid_row)
+    if failures:
+        raise SystemExit(f"FAIL: invalid rows not isolated: {', '.join(failures)}")
+    await throughput(prediction_service.app, valid_row, args.requests)
+    await batcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=None, help="model artifact to serve (default: the service's)")
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+    if args.model:
+        # Read by prediction_service at import
+        os.environ["SALARY_MODEL_FILE"] = args.model
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
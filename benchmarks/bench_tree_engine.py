@@ -0,0 +1,83 @@
+"""
+Check the NumPy tree engine against regressor.predict and compare cost.
+
+    python benchmarks/bench_tree_engine.py [saved_steps.pkl]
+
+Fails if any prediction differs, then reports cold-start time (fresh
+interpreter: import + load of the pickle and of the app's model bundle) and
+batched predict latency for both paths.
+"""
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from common import best_of  # noqa: E402
+from model_bundle import save_bundle  # noqa: E402
+from tree_engine import export_tree, predict_tree  # noqa: E402
+
+BATCH_SIZES = [1, 100, 10_000, 1_000_000]
+
+# Models fitted on a DataFrame warn on every ndarray predict
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def random_inputs(data, n, seed=0):
+    """Random encoded rows spanning the model's input domain"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(0, len(data["le_country"].classes_), n),
+        rng.integers(0, len(data["le_education"].classes_), n),
+        rng.choice(np.append(np.arange(51), 0.5), n),
+    ]).astype(float)
+
+
+def cold_start(code):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    model_file = sys.argv[1] if len(sys.argv) > 1 else "saved_steps.pkl"
+    with open(model_file, 'rb') as file:
+        data = pickle.load(file)
+    regressor = data["model"]
+    tree = export_tree(regressor)
+
+    # Equivalence on every grid point plus random rows
+    shape = (len(data["le_country"].classes_), len(data["le_education"].classes_), 51)
+    grid = np.indices(shape).reshape(len(shape), -1).T.astype(float)
+    X = np.vstack([grid, random_inputs(data, 100_000)])
+    expected = regressor.predict(X)
+    actual = predict_tree(tree, X)
+    if not np.array_equal(expected, actual):
+        mismatches = int((expected != actual).sum())
+        raise SystemExit(f"FAIL: {mismatches} of {len(X)} predictions differ")
+    print(f"OK: {len(X):,} predictions identical to regressor.predict")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle = os.path.join(tmp, "saved_model")
+        save_bundle(bundle, regressor, data["le_country"], data["le_education"])
+        sklearn_start = cold_start(
+            f"import pickle; pickle.load(open({os.path.abspath(model_file)!r}, 'rb'))")
+        engine_start = cold_start(
+            f"import sys; sys.path.insert(0, {ROOT!r}); from model_bundle import load_bundle; load_bundle({bundle!r})")
+    print(f"Cold start   sklearn pickle: {sklearn_start * 1000:8.1f} ms   bundle: {engine_start * 1000:8.1f} ms")
+
+    for size in BATCH_SIZES:
+        X = random_inputs(data, size, seed=size)
+        _, sklearn_time = best_of(lambda: regressor.predict(X))
+        _, engine_time = best_of(lambda: predict_tree(tree, X))
+        print(f"Batch {size:>9,}  sklearn: {sklearn_time * 1000:10.3f} ms   numpy: {engine_time * 1000:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
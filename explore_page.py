@@ -1,56 +1,66 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-
-def shorten_categories(categories, cutoff):
-    categorical_map = {}
-    for i in range(len(categories)):
-        if categories.values[i] >= cutoff:
-            categorical_map[categories.index[i]] = categories.index[i]
-        else:
-            categorical_map[categories.index[i]] = 'Other'
-    return categorical_map
-
-
-def clean_experience(x):
-    if x ==  'More than 50 years':
-        return 50
-    if x == 'Less than 1 year':
-        return 0.5
-    return float(x)
-
-
-def clean_education(x):
-    if 'Bachelor’s degree' in x:
-        return 'Bachelor’s degree'
-    if 'Master’s degree' in x:
-        return 'Master’s degree'
-    if 'Professional degree' in x or 'Other doctoral' in x:
-        return 'Post grad'
-    return 'Less than a Bachelors'
-
-
-@st.cache
-def load_data():
-    df = pd.read_csv("survey_results_public.csv")
-    df = df[["Country", "EdLevel", "YearsCodePro", "Employment", "ConvertedComp"]]
-    df = df[df["ConvertedComp"].notnull()]
-    df = df.dropna()
-    df = df[df["Employment"] == "Employed full-time"]
-    df = df.drop("Employment", axis=1)
-
-    country_map = shorten_categories(df.Country.value_counts(), 400)
-    df["Country"] = df["Country"].map(country_map)
-    df = df[df["ConvertedComp"] <= 250000]
-    df = df[df["ConvertedComp"] >= 10000]
-    df = df[df["Country"] != "Other"]
-
-    df["YearsCodePro"] = df["YearsCodePro"].apply(clean_experience)
-    df["EdLevel"] = df["EdLevel"].apply(clean_education)
-    df = df.rename({"ConvertedComp": "Salary"}, axis=1)
-    return df
-
-df = load_data()
+from matplotlib.figure import Figure
+import hashlib
+import io
+import time
+from filter_index import FilterIndex
+from result_cache import ResultCache
+from salary_cube import histogram_series
+from survey_data import (DEFAULT_YEAR, available_years, load_clean_survey, load_salary_cube,
+                         load_salary_sketches)
+
+# Only the partitions of the selected years are loaded; max_entries bounds how
+# many selections stay in memory
+@st.cache_resource(max_entries=2)
+def load_data(years):
+    # Cleaned frame comes from the on-disk Parquet cache, rebuilt only when the
+    # CSV or the cleaning code changes; the cached object is shared read-only
+    return load_clean_survey(years)
+
+@st.cache_resource(max_entries=8)
+def load_cube(years):
+    # Count / sum / histogram per (Country, EdLevel, YearsCodePro), built at ingestion
+    return load_salary_cube(years)
+
+@st.cache_resource(max_entries=8)
+def load_sketches(years):
+    # Mergeable salary quantile sketches per country and per experience, built at ingestion
+    return load_salary_sketches(years)
+
+# Rendered pie charts as PNG bytes, keyed by a hash of the plotted counts
+chart_cache = ResultCache(max_entries=64, ttl=24 * 3600)
+chart_render_stats = {"renders": 0, "render_seconds": 0.0}
+# Salary bin counts per filter combination; only these reach the browser
+histogram_cache = ResultCache(max_entries=256, ttl=24 * 3600)
+
+@st.cache_resource(max_entries=2)
+def load_filter_index(years):
+    # Per-category row bitmaps, so combining filters is a bitwise AND
+    return FilterIndex(load_data(years))
+
+def render_country_pie(data):
+    """PNG of the country pie chart, rendered only for counts not seen before"""
+    key = hashlib.sha256(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes()).hexdigest()
+    png = chart_cache.get(key)
+    if png is not None:
+        return png
+
+    start = time.perf_counter()
+    # A Figure of its own, not pyplot's global state, so concurrent sessions
+    # can render safely; it is freed like any other object
+    fig1 = Figure()
+    ax1 = fig1.subplots()
+    ax1.pie(data, labels=data.index, autopct="%1.1f%%", shadow=True, startangle=90)
+    ax1.axis("equal")  # Equal aspect ratio ensures that pie is drawn as a circle.
+    buffer = io.BytesIO()
+    fig1.savefig(buffer, format="png", dpi=200, bbox_inches="tight")
+    png = buffer.getvalue()
+
+    chart_render_stats["renders"] += 1
+    chart_render_stats["render_seconds"] += time.perf_counter() - start
+    chart_cache.put(key, png)
+    return png
 
 def show_explore_page():
     # Import and apply the dropdown fix
@@ -61,22 +71,65 @@ def show_explore_page():
 
     st.title("Explore Software Engineer Salaries")
 
+    years = available_years()
+    if not years:
+        st.error("No survey data found. Add survey exports under surveys/<year>/.")
+        return
+    default_year = DEFAULT_YEAR if DEFAULT_YEAR in years else years[-1]
+    selected_years = st.multiselect("Survey Years", years, default=[default_year])
+    if not selected_years:
+        st.warning("Select at least one survey year.")
+        return
+    selected_years = tuple(sorted(selected_years))
+
     st.write(
-        """
-    ### Stack Overflow Developer Survey 2020
+        f"""
+    ### Stack Overflow Developer Survey {", ".join(str(year) for year in selected_years)}
     """
     )
 
-    data = df["Country"].value_counts()
+    cube = load_cube(selected_years)
+    index = load_filter_index(selected_years)
+
+    st.write("""#### Filter""")
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_countries = st.multiselect("Country (all if empty)", index.categories["Country"])
+    with col2:
+        selected_education = st.multiselect("Education Level (all if empty)", index.categories["EdLevel"])
+    experience_range = st.slider("Years of Experience", 0.0, 50.0, (0.0, 50.0), step=0.5)
+
+    start = time.perf_counter()
+    mask = index.select(
+        categories={"Country": selected_countries, "EdLevel": selected_education},
+        ranges={"YearsCodePro": experience_range},
+    )
 
-    fig1, ax1 = plt.subplots()
-    ax1.pie(data, labels=data.index, autopct="%1.1f%%", shadow=True, startangle=90)
-    ax1.axis("equal")  # Equal aspect ratio ensures that pie is drawn as a circle.
+    if mask is None:
+        # Unfiltered charts are answered from the pre-aggregated cube
+        country_counts = cube.counts("Country")
+        country_means = cube.mean("Country")
+        experience_means = cube.mean("YearsCodePro")
+    else:
+        rows = index.rows(mask)
+        if len(rows) == 0:
+            st.warning("No survey responses match the selected filters.")
+            return
+        country_stats = index.group_stats("Country", rows)
+        country_counts = country_stats["count"].sort_values(ascending=False)
+        country_means = country_stats["mean"]
+        experience_means = index.group_stats("YearsCodePro", rows)["mean"]
+
+    elapsed = time.perf_counter() - start
+    st.caption(f"{int(country_counts.sum()):,} of {index.n_rows:,} responses selected in {elapsed * 1000:.1f} ms")
+
+    data = country_counts
 
     st.write("""#### Number of Data from different countries""")
 
-    # Show the chart
-    st.pyplot(fig1)
+    # Show the chart, reusing the cached render when the counts are unchanged
+    # No width argument: every Streamlit version scales it down to the column
+    st.image(render_country_pie(data))
 
     st.write(
         """
@@ -84,7 +137,7 @@ def show_explore_page():
     """
     )
 
-    data = df.groupby(["Country"])["Salary"].mean().sort_values(ascending=True)
+    data = country_means.sort_values(ascending=True)
     st.bar_chart(data)
 
     st.write(
@@ -93,5 +146,55 @@ def show_explore_page():
     """
     )
 
-    data = df.groupby(["YearsCodePro"])["Salary"].mean().sort_values(ascending=True)
+    data = experience_means.sort_values(ascending=True)
     st.line_chart(data)
+
+    st.write(
+        """
+    #### Salary Distribution
+    """
+    )
+
+    # Binned on the server, so the chart payload is the same size for any number of rows
+    key = (selected_years, tuple(sorted(selected_countries)), tuple(sorted(selected_education)), experience_range)
+    counts = histogram_cache.get(key)
+    if counts is None:
+        counts = cube.histogram() if mask is None else index.histogram(rows)
+        histogram_cache.put(key, counts)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        bin_width = st.select_slider("Bin Width", options=[1000, 2000, 5000, 10000], value=5000)
+    with col2:
+        as_density = st.checkbox("Show share of responses")
+    data = histogram_series(counts, bin_width)
+    if as_density:
+        data = data / max(int(data.sum()), 1)
+    st.bar_chart(data)
+
+    # Median and p90 come from the per-group sketches of all responses in the
+    # selected years; only the country / experience selection applies to them
+    sketches = load_sketches(selected_years)
+    st.write(
+        """
+    #### Median and 90th Percentile Salary Based On Country
+    """
+    )
+
+    data = sketches.quantiles("Country")
+    if selected_countries:
+        data = data[data.index.isin(selected_countries)]
+    st.bar_chart(data[["p50", "p90"]].sort_values("p50", ascending=True))
+
+    st.write(
+        """
+    #### Median and 90th Percentile Salary Based On Experience
+    """
+    )
+
+    data = sketches.quantiles("YearsCodePro")
+    data.index = data.index.astype(float)
+    data = data[(data.index >= experience_range[0]) & (data.index <= experience_range[1])]
+    st.line_chart(data[["p50", "p90"]].sort_index())
+    if selected_education:
+        st.caption("Percentiles cover all education levels.")
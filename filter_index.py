@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from salary_cube import N_BINS, salary_bins
+
+
+class FilterIndex:
+    def __init__(self, df, categorical=("Country", "EdLevel"), numeric=("YearsCodePro",), value="Salary"):
+        """Precomputed row bitmaps and sorted indexes for fast filtering of the survey rows"""
+        self.n_rows = len(df)
+        # Kept in the frame's own (possibly float32) dtype; bincount sums in float64
+        self.values = df[value].to_numpy()
+        # Pre-binned salaries (N_BINS < 256) for server-side histograms
+        self.value_bins = salary_bins(self.values).astype(np.uint8)
+        self.categories = {}
+        self.codes = {}
+        self.bitmaps = {}
+        self.sorted_rows = {}
+        self.sorted_values = {}
+
+        for column in categorical + numeric:
+            codes, uniques = pd.factorize(df[column], sort=True)
+            # Narrowest integer type for the codes instead of int64
+            self.codes[column] = codes.astype(np.min_scalar_type(max(len(uniques) - 1, 0)))
+            self.categories[column] = list(uniques)
+
+        # One packed bitmap (n_rows / 8 bytes) per category value
+        for column in categorical:
+            codes = self.codes[column]
+            self.bitmaps[column] = {
+                category: np.packbits(codes == k) for k, category in enumerate(self.categories[column])
+            }
+
+        # Numeric columns are filtered by range through a sorted row index
+        for column in numeric:
+            values = df[column].to_numpy()
+            order = np.argsort(values, kind="stable")
+            self.sorted_rows[column] = order.astype(np.min_scalar_type(max(self.n_rows - 1, 0)))
+            self.sorted_values[column] = values[order]
+
+    def category_mask(self, column, selected):
+        """Packed bitmap of the rows whose column is any of the selected categories"""
+        bitmaps = self.bitmaps[column]
+        mask = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        for category in selected:
+            if category in bitmaps:
+                np.bitwise_or(mask, bitmaps[category], out=mask)
+        return mask
+
+    def range_mask(self, column, low, high):
+        """Packed bitmap of the rows with low <= column <= high"""
+        sorted_values = self.sorted_values[column]
+        start = np.searchsorted(sorted_values, low, side="left")
+        stop = np.searchsorted(sorted_values, high, side="right")
+        bits = np.zeros(self.n_rows, dtype=bool)
+        bits[self.sorted_rows[column][start:stop]] = True
+        return np.packbits(bits)
+
+    def select(self, categories=None, ranges=None):
+        """AND the filters together; returns a packed bitmap, or None when nothing is filtered
+
+        categories maps a categorical column to the selected values (empty means all),
+        ranges maps a numeric column to an inclusive (low, high) pair.
+        """
+        mask = None
+        for column, selected in (categories or {}).items():
+            if not selected or set(selected) >= set(self.categories[column]):
+                continue
+            column_mask = self.category_mask(column, selected)
+            mask = column_mask if mask is None else np.bitwise_and(mask, column_mask, out=mask)
+
+        for column, (low, high) in (ranges or {}).items():
+            sorted_values = self.sorted_values[column]
+            if len(sorted_values) == 0 or (low <= sorted_values[0] and high >= sorted_values[-1]):
+                continue
+            column_mask = self.range_mask(column, low, high)
+            mask = column_mask if mask is None else np.bitwise_and(mask, column_mask, out=mask)
+        return mask
+
+    def rows(self, mask):
+        """Row positions selected by a mask from select(); None selects every row"""
+        if mask is None:
+            return None
+        return np.flatnonzero(np.unpackbits(mask, count=self.n_rows))
+
+    def histogram(self, rows=None):
+        """Salary bin counts over the selected rows"""
+        bins = self.value_bins if rows is None else self.value_bins[rows]
+        return np.bincount(bins, minlength=N_BINS)
+
+    def group_stats(self, column, rows=None):
+        """Row count and mean value per category of column, over the selected rows"""
+        codes = self.codes[column]
+        values = self.values
+        if rows is not None:
+            codes = codes[rows]
+            values = values[rows]
+        n_groups = len(self.categories[column])
+        counts = np.bincount(codes, minlength=n_groups)
+        sums = np.bincount(codes, weights=values, minlength=n_groups)
+        stats = pd.DataFrame({"count": counts, "mean": sums / np.maximum(counts, 1)},
+                             index=pd.Index(self.categories[column], name=column))
+        return stats[stats["count"] > 0]
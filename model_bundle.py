@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from tree_engine import TreeModel, export_tree
+
+# Directory written next to saved_steps.pkl by the notebook export cell
+BUNDLE_DIR = "saved_model"
+MANIFEST_FILE = "manifest.json"
+BUNDLE_FORMAT = "salary-model-bundle"
+# Bump when the manifest or array layout changes incompatibly
+FORMAT_VERSION = 1
+# Arrays that make up the decision tree, as produced by tree_engine.export_tree
+TREE_ARRAYS = ("feature", "threshold", "left", "right", "value")
+
+
+class ArrayEncoder:
+    def __init__(self, classes):
+        """Drop-in for a fitted LabelEncoder backed by its sorted classes_ array"""
+        self.classes_ = classes
+
+    def transform(self, values):
+        values = np.asarray(values).astype(str)
+        codes = np.searchsorted(self.classes_, values)
+        codes = np.minimum(codes, len(self.classes_) - 1)
+        unseen = self.classes_[codes] != values
+        if unseen.any():
+            raise ValueError(f"y contains previously unseen labels: {sorted(set(values[unseen].tolist()))}")
+        return codes
+
+    def inverse_transform(self, codes):
+        return self.classes_[np.asarray(codes, dtype=int)]
+
+
+def _file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def save_bundle(path, regressor, le_country, le_education, extra_arrays=None, metadata=None):
+    """Write the model as a manifest plus one .npy file per array; metadata (JSON) is stored as is"""
+    tree = export_tree(regressor)
+    arrays = {name: tree[name] for name in TREE_ARRAYS}
+    # Fixed-width unicode rather than object arrays, so they can be memory-mapped
+    arrays["country_classes"] = np.asarray(le_country.classes_, dtype=str)
+    arrays["education_classes"] = np.asarray(le_education.classes_, dtype=str)
+    arrays.update(extra_arrays or {})
+
+    # Build the new bundle beside the old one and swap it in, so readers
+    # never see a half-written directory
+    staging = f"{path}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    entries = {}
+    for name, array in arrays.items():
+        file_name = f"{name}.npy"
+        file_path = os.path.join(staging, file_name)
+        np.save(file_path, np.ascontiguousarray(array))
+        entries[name] = {
+            "file": file_name,
+            "dtype": str(array.dtype),
+            "shape": list(array.shape),
+            "size": os.path.getsize(file_path),
+            "sha256": _file_sha256(file_path),
+        }
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "format_version": FORMAT_VERSION,
+        "model_type": type(regressor).__name__,
+        "created_at": datetime.now().isoformat(),
+        "feature_columns": ["Country", "EdLevel", "YearsCodePro"],
+        "max_depth": int(tree["max_depth"]),
+        "arrays": entries,
+    }
+    if metadata:
+        manifest["metadata"] = metadata
+    with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    previous = f"{path}.old"
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, previous)
+    os.rename(staging, path)
+    shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_FILE), "r") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"{path} is not a salary model bundle")
+    if manifest.get("format_version", 0) > FORMAT_VERSION:
+        raise ValueError(
+            f"Bundle format version {manifest['format_version']} is newer than the supported version {FORMAT_VERSION}")
+    return manifest
+
+
+def load_bundle(path=BUNDLE_DIR, mmap_mode="r", verify=False):
+    """Open a bundle, memory-mapping its arrays so processes share one page-cache copy
+
+    Only file sizes, dtypes and shapes are checked against the manifest, which
+    touches no array data; verify=True also hashes every file in full.
+    """
+    manifest = read_manifest(path)
+
+    arrays = {}
+    for name, entry in manifest["arrays"].items():
+        file_path = os.path.join(path, entry["file"])
+        if "size" in entry and os.path.getsize(file_path) != entry["size"]:
+            raise ValueError(f"Size mismatch for {entry['file']} in {path}")
+        if verify and _file_sha256(file_path) != entry["sha256"]:
+            raise ValueError(f"Checksum mismatch for {entry['file']} in {path}")
+        arrays[name] = np.load(file_path, mmap_mode=mmap_mode)
+        if str(arrays[name].dtype) != entry["dtype"] or list(arrays[name].shape) != entry["shape"]:
+            raise ValueError(f"{entry['file']} in {path} does not match its manifest entry")
+
+    tree = {name: arrays[name] for name in TREE_ARRAYS}
+    tree["max_depth"] = manifest["max_depth"]
+    data = {
+        "model": TreeModel(tree),
+        "le_country": ArrayEncoder(arrays["country_classes"]),
+        "le_education": ArrayEncoder(arrays["education_classes"]),
+        "manifest": manifest,
+        "arrays": arrays,
+    }
+    # Optional per-leaf salary quantiles for prediction intervals
+    if "leaf_quantiles" in arrays:
+        data["leaf_quantiles"] = arrays["leaf_quantiles"]
+    return data
@@ -0,0 +1,99 @@
+import time
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeRegressor
+
+from tree_engine import export_tree, leaf_quantiles, predict_tree
+
+# Leaf counts tried, smallest first, when distilling to a latency budget
+LEAF_CANDIDATES = [16, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+# Share of the rows held out to measure the accuracy lost
+HOLDOUT = 0.2
+# Rows per batch when timing the serving engine
+LATENCY_BATCH = 10_000
+RANDOM_STATE = 0
+
+
+def distill_tree(teacher, X, max_leaf_nodes=None, random_state=RANDOM_STATE):
+    """Tree fit to the teacher's predictions on the distinct rows of X, weighted by how often each occurs
+
+    The features are all discrete, so this equals fitting on every row while
+    asking the teacher for far fewer predictions. Without max_leaf_nodes the
+    tree is a lookup table that reproduces the teacher on every training row.
+    """
+    cells, counts = np.unique(X, axis=0, return_counts=True)
+    student = DecisionTreeRegressor(max_leaf_nodes=max_leaf_nodes, random_state=random_state)
+    student.fit(cells, teacher.predict(cells), sample_weight=counts)
+    return student
+
+
+def tree_latency_us(model, X, repeat=5):
+    """Microseconds per row of the app's tree engine on a batch of X"""
+    tree = export_tree(model)
+    batch = X[np.arange(LATENCY_BATCH) % len(X)]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict_tree(tree, batch)
+        best = min(best, time.perf_counter() - start)
+    return best / len(batch) * 1e6
+
+
+def leaves_for_budget(teacher, X, latency_us, random_state=RANDOM_STATE):
+    """Largest candidate leaf count whose distilled tree predicts within latency_us per row"""
+    chosen = None
+    for leaves in LEAF_CANDIDATES:
+        student = distill_tree(teacher, X, leaves, random_state)
+        if tree_latency_us(student, X) > latency_us:
+            break
+        chosen = leaves
+        # More leaves than distinct rows cannot change the tree
+        if student.get_n_leaves() < leaves:
+            break
+    if chosen is None:
+        raise ValueError(f"No distilled tree predicts within {latency_us} µs per row; "
+                         f"the smallest has {LEAF_CANDIDATES[0]} leaves")
+    return chosen
+
+
+def rmse(predicted, y):
+    return float(np.sqrt(np.mean((np.asarray(predicted) - y) ** 2)))
+
+
+def compress(fitted, X, y, max_leaf_nodes=None, latency_us=None, random_state=RANDOM_STATE):
+    """Distill a fitted model into a tree with max_leaf_nodes leaves, or as many as latency_us allows
+
+    Returns the student like train.fit does, plus a report of the accuracy
+    lost on held-out rows; a copy of the teacher is refit without them.
+    """
+    teacher = fitted["model"]
+    if latency_us is not None:
+        max_leaf_nodes = leaves_for_budget(teacher, X, latency_us, random_state)
+
+    train_rows, test_rows = train_test_split(np.arange(len(y)), test_size=HOLDOUT, random_state=random_state)
+    holdout_teacher = clone(teacher).fit(X[train_rows], y[train_rows])
+    holdout_student = distill_tree(holdout_teacher, X[train_rows], max_leaf_nodes, random_state)
+    teacher_rmse = rmse(holdout_teacher.predict(X[test_rows]), y[test_rows])
+    student_rmse = rmse(holdout_student.predict(X[test_rows]), y[test_rows])
+
+    student = distill_tree(teacher, X, max_leaf_nodes, random_state)
+    predicted = student.predict(X)
+    return {
+        "family": "tree",
+        "model": student,
+        "leaf_quantiles": leaf_quantiles(student.apply(X), y, student.tree_.node_count),
+        "train_rmse": rmse(predicted, y),
+        "distillation": {
+            "teacher": fitted["family"],
+            "leaves": int(student.get_n_leaves()),
+            "max_leaf_nodes": max_leaf_nodes,
+            "latency_us": tree_latency_us(student, X),
+            "teacher_holdout_rmse": teacher_rmse,
+            "student_holdout_rmse": student_rmse,
+            "accuracy_lost": student_rmse - teacher_rmse,
+            # How closely the student follows the teacher on the training rows
+            "fidelity_rmse": rmse(predicted, teacher.predict(X)),
+        },
+    }
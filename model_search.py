@@ -0,0 +1,161 @@
+import math
+import multiprocessing
+import os
+import queue
+import time
+
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.model_selection import KFold, ParameterGrid
+from sklearn.tree import DecisionTreeRegressor
+from threadpoolctl import threadpool_limits
+
+# Model families the search can draw candidates from
+FAMILIES = {
+    "tree": DecisionTreeRegressor,
+    "forest": RandomForestRegressor,
+    "hist_gbm": HistGradientBoostingRegressor,
+}
+# Parameter grid of every family; far wider than the notebook's max_depth-only grid
+SEARCH_SPACES = {
+    "tree": {
+        "max_depth": [None, 2, 4, 6, 8, 10, 12, 16],
+        "min_samples_leaf": [1, 2, 5, 10, 20, 50],
+        "max_leaf_nodes": [None, 16, 64, 256, 1024],
+    },
+    "forest": {
+        "n_estimators": [50, 100],
+        "max_depth": [8, 12, None],
+        "min_samples_leaf": [1, 5, 20],
+    },
+    "hist_gbm": {
+        "learning_rate": [0.05, 0.1, 0.2],
+        "max_leaf_nodes": [15, 31, 63],
+        "min_samples_leaf": [20, 50],
+    },
+}
+# Each round keeps the best 1 / HALVING_FACTOR of the candidates on HALVING_FACTOR times the rows
+HALVING_FACTOR = 3
+MIN_RESOURCES = 1000
+RANDOM_STATE = 0
+
+
+def make_model(family, params, random_state=RANDOM_STATE):
+    """Unfitted estimator of a family; forests stay single-threaded inside a worker"""
+    extra = {"n_jobs": 1} if family == "forest" else {}
+    return FAMILIES[family](random_state=random_state, **extra, **params)
+
+
+def candidates(families=("tree",), spaces=None):
+    """(family, params) for every point of the families' grids"""
+    spaces = dict(SEARCH_SPACES, **(spaces or {}))
+    return [(family, params) for family in families for params in ParameterGrid(spaces[family])]
+
+
+# Training data of a worker process, sent once through the pool initializer
+# rather than with every task
+_worker_data = {}
+
+
+def _init_worker(X, y, random_state):
+    # The pool already uses every core; OpenMP / BLAS threads per worker
+    # (HistGradientBoosting starts one per core) would oversubscribe them
+    threadpool_limits(1)
+    _worker_data["X"] = X
+    _worker_data["y"] = y
+    # One fixed shuffle, so a round on n rows uses the same rows for every candidate
+    _worker_data["order"] = np.random.default_rng(random_state).permutation(len(y))
+    _worker_data["random_state"] = random_state
+
+
+def _fit_fold(family, params, n_rows, fold, cv):
+    """Validation MSE of one candidate on one fold of the first n_rows shuffled rows"""
+    X, y = _worker_data["X"], _worker_data["y"]
+    rows = _worker_data["order"][:n_rows]
+    train, test = list(KFold(cv).split(rows))[fold]
+    model = make_model(family, params, _worker_data["random_state"])
+    model.fit(X[rows[train]], y[rows[train]])
+    error = model.predict(X[rows[test]]) - y[rows[test]]
+    return float(np.mean(error ** 2))
+
+
+def successive_halving(X, y, candidate_list, cv=5, factor=HALVING_FACTOR, min_resources=MIN_RESOURCES,
+                       budget=None, n_jobs=None, random_state=RANDOM_STATE):
+    """Cross-validated successive halving, with candidate x fold fits spread over a process pool
+
+    Stops early when budget (seconds of wall clock) runs out and returns the
+    best candidate of the last round that finished.
+    """
+    if not candidate_list:
+        raise ValueError("No candidates to search")
+    start = time.perf_counter()
+    deadline = start + budget if budget else None
+    n_samples = len(y)
+    # Enough rounds to get down to one candidate, the last one on every row
+    n_rounds = max(1, math.ceil(math.log(len(candidate_list), factor)))
+    min_resources = min(n_samples, max(min_resources, 2 * cv))
+    schedule = [max(min_resources, int(n_samples / factor ** (n_rounds - 1 - i))) for i in range(n_rounds)]
+    # Rounds clamped to min_resources would refit the survivors on the same
+    # rows and folds, so get the same scores: run each row count once and
+    # prune as much as all the rounds it stands for
+    resources = sorted(set(schedule))
+
+    # Shuffled, so a round cut short by the budget still samples every family
+    alive = [int(i) for i in np.random.default_rng(random_state).permutation(len(candidate_list))]
+    best, best_mse = None, None
+    rounds = []
+    timed_out = False
+    # A multiprocessing pool rather than concurrent.futures, so fits still
+    # running when the budget runs out can be killed instead of waited for
+    pool = multiprocessing.Pool(n_jobs or os.cpu_count(), initializer=_init_worker, initargs=(X, y, random_state))
+    try:
+        for n_rows in resources:
+            round_start = time.perf_counter()
+            finished = queue.Queue()
+            for i in alive:
+                for fold in range(cv):
+                    pool.apply_async(_fit_fold, (*candidate_list[i], n_rows, fold, cv),
+                                     callback=lambda mse, i=i: finished.put((i, mse)),
+                                     error_callback=lambda error: finished.put((None, error)))
+            fold_mse = {i: [] for i in alive}
+            for _ in range(len(alive) * cv):
+                timeout = None if deadline is None else max(deadline - time.perf_counter(), 0)
+                try:
+                    i, mse = finished.get(timeout=timeout)
+                except queue.Empty:
+                    timed_out = True
+                    break
+                if i is None:
+                    raise mse
+                fold_mse[i].append(mse)
+
+            scored = {i: np.mean(mse) for i, mse in fold_mse.items() if len(mse) == cv}
+            rounds.append({"candidates": len(alive), "rows": n_rows, "fits": sum(map(len, fold_mse.values())),
+                           "seconds": time.perf_counter() - round_start, "complete": not timed_out})
+            if timed_out:
+                # A partial first round is still better than nothing
+                if best is None and scored:
+                    best = min(scored, key=scored.get)
+                    best_mse = scored[best]
+                break
+            ranked = sorted(scored, key=scored.get)
+            best, best_mse = ranked[0], scored[ranked[0]]
+            alive = ranked[:max(1, len(ranked) // factor ** schedule.count(n_rows))]
+    finally:
+        # Kills the fits of a round stopped by the budget, so none outlive it
+        pool.terminate()
+        pool.join()
+
+    if best is None:
+        raise ValueError(f"The search budget of {budget} s ran out before any candidate finished")
+    family, params = candidate_list[best]
+    return {
+        "family": family,
+        "best_params": params,
+        "cv_rmse": float(np.sqrt(best_mse)),
+        "candidates": len(candidate_list),
+        "fits": sum(r["fits"] for r in rounds),
+        "rounds": rounds,
+        "timed_out": timed_out,
+        "seconds": time.perf_counter() - start,
+    }
@@ -0,0 +1,131 @@
+import hashlib
+import os
+import threading
+import time
+
+from model_bundle import MANIFEST_FILE
+from salary_model import Predictor, load_model, model_artifact
+
+# Minimum seconds between two checks of the artifact on disk
+CHECK_INTERVAL = 2.0
+
+
+def watched_file(path):
+    """File whose change signals a new model: the manifest of a bundle, or the pickle itself"""
+    if os.path.isdir(path):
+        return os.path.join(path, MANIFEST_FILE)
+    return path
+
+
+def artifact_version(path):
+    """Content hash identifying a model artifact"""
+    # A bundle manifest already lists the sha256 of every array file
+    sha = hashlib.sha256()
+    with open(watched_file(path), 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()[:16]
+
+
+class ModelStore:
+    def __init__(self, path=None, check_interval=CHECK_INTERVAL):
+        """Lazily loaded model shared by the whole process, hot-reloaded when the artifact changes"""
+        self.path = path
+        self.check_interval = check_interval
+        self.last_error = None
+        self._current = None
+        self._fingerprint = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._listeners = []
+
+    def on_reload(self, callback):
+        """Call callback(predictor) after every model swap"""
+        self._listeners.append(callback)
+
+    def get(self):
+        """Return the current Predictor, loading it on first use"""
+        current = self._current
+        if current is None:
+            with self._lock:
+                if self._current is None:
+                    path, fingerprint = self._stat()
+                    self._install(self._build(path), fingerprint)
+                return self._current
+
+        if time.monotonic() >= self._next_check:
+            self._check_for_update()
+        # Callers keep whichever predictor they got; a reload only swaps the reference
+        return current
+
+    @property
+    def version(self):
+        current = self._current
+        return current.version if current is not None else None
+
+    def _artifact(self):
+        return self.path if self.path is not None else model_artifact()
+
+    def _stat(self):
+        path = self._artifact()
+        stat = os.stat(watched_file(path))
+        return path, (path, stat.st_mtime_ns, stat.st_size)
+
+    def _build(self, path, verify=False):
+        return Predictor(load_model(path, verify=verify), version=artifact_version(path))
+
+    def _install(self, predictor, fingerprint):
+        self._current = predictor
+        self._fingerprint = fingerprint
+        self._next_check = time.monotonic() + self.check_interval
+        for callback in self._listeners:
+            callback(predictor)
+
+    def _check_for_update(self):
+        with self._lock:
+            if self._reloading or time.monotonic() < self._next_check:
+                return
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                path, fingerprint = self._stat()
+            except OSError:
+                # Artifact is being replaced; look again on the next check
+                return
+            if fingerprint == self._fingerprint:
+                return
+            self._reloading = True
+
+        threading.Thread(target=self._reload, args=(path, fingerprint), daemon=True).start()
+
+    def _reload(self, path, fingerprint):
+        try:
+            # A touched but unchanged artifact keeps the loaded model
+            if artifact_version(path) == self.version:
+                with self._lock:
+                    self._fingerprint = fingerprint
+                return
+            # Reloads run off the request path, so a new artifact is checksummed in full once
+            predictor = self._build(path, verify=True)
+            with self._lock:
+                self._install(predictor, fingerprint)
+            self.last_error = None
+        except Exception as e:
+            # Keep serving the previous model; the next check retries
+            self.last_error = e
+        finally:
+            self._reloading = False
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_model_store():
+    """Process-wide ModelStore for the default artifact"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = ModelStore()
+    return _default_store
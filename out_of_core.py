@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from sklearn.preprocessing import LabelEncoder
+from sklearn.tree import DecisionTreeRegressor
+
+from salary_cube import BIN_COLUMNS, DIMENSIONS, histogram_quantile
+from tree_engine import QUANTILES
+
+# Every feature is categorical or a whole / half year, so all rows of a
+# (Country, EdLevel, YearsCodePro) cell share one feature vector. A tree fit
+# on the cells' mean salaries weighted by their row counts makes the same
+# squared-error splits as one fit on the rows, and the per-cell sums give
+# exact row-level errors, so training only keeps one small row per cell.
+STAT_COLUMNS = ["count", "sum", "sum_sq"]
+# Cross-validation folds, assigned per row while streaming
+FOLDS = 5
+# Rows per Parquet batch; bounds the memory of the streaming pass
+BATCH_ROWS = 100_000
+RANDOM_STATE = 0
+
+
+def row_folds(rows, folds=FOLDS, random_state=RANDOM_STATE):
+    """Fold of every global row number, from a hash so it does not depend on batch boundaries"""
+    x = np.asarray(rows, dtype=np.uint64) + np.uint64(random_state) * np.uint64(0x9E3779B97F4A7C15)
+    # splitmix64 finalizer
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return (x % np.uint64(folds)).astype(np.int64)
+
+
+def aggregate(paths, folds=FOLDS, batch_rows=BATCH_ROWS, random_state=RANDOM_STATE):
+    """Stream cleaned Parquet files into salary count / sum / sum of squares per (cell, fold)"""
+    stats = None
+    offset = 0
+    for path in paths:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=DIMENSIONS + ["Salary"]):
+            df = batch.to_pandas()
+            salary = df["Salary"].to_numpy(dtype=float)
+            df = df.assign(Fold=row_folds(np.arange(offset, offset + len(df)), folds, random_state),
+                           count=1, sum=salary, sum_sq=salary ** 2)
+            offset += len(df)
+            part = df.groupby(DIMENSIONS + ["Fold"], sort=False)[STAT_COLUMNS].sum()
+            stats = part if stats is None else pd.concat([stats, part]).groupby(level=DIMENSIONS + ["Fold"],
+                                                                                sort=False).sum()
+    if stats is None:
+        raise ValueError("No rows to train on")
+    return stats.sort_index()
+
+
+def fit_encoders(stats):
+    """LabelEncoders over the cell keys; the same classes a fit on the rows would find"""
+    le_country = LabelEncoder().fit(stats.index.get_level_values("Country"))
+    le_education = LabelEncoder().fit(stats.index.get_level_values("EdLevel"))
+    return le_country, le_education
+
+
+def cell_matrix(cells, le_country, le_education):
+    """Feature matrix of a frame indexed by (Country, EdLevel, YearsCodePro)"""
+    return np.column_stack([
+        le_country.transform(cells.index.get_level_values("Country")),
+        le_education.transform(cells.index.get_level_values("EdLevel")),
+        cells.index.get_level_values("YearsCodePro").to_numpy(dtype=float),
+    ]).astype(float)
+
+
+def cells_of(stats, folds=None, exclude=None):
+    """Statistics per cell summed over the given folds (all by default), or over all but exclude"""
+    fold = stats.index.get_level_values("Fold")
+    if folds is not None:
+        stats = stats[fold.isin(folds)]
+    if exclude is not None:
+        stats = stats[fold != exclude]
+    return stats.groupby(level=DIMENSIONS).sum()
+
+
+def fit_cells(cells, le_country, le_education, params, random_state=RANDOM_STATE):
+    """Decision tree on the cell means weighted by row count"""
+    model = DecisionTreeRegressor(random_state=random_state, **params)
+    model.fit(cell_matrix(cells, le_country, le_education), cells["sum"] / cells["count"],
+              sample_weight=cells["count"])
+    return model
+
+
+def squared_error(model, cells, le_country, le_education):
+    """Exact sum of squared errors over the rows of the cells"""
+    predicted = model.predict(cell_matrix(cells, le_country, le_education))
+    return float((cells["sum_sq"] - 2 * predicted * cells["sum"] + cells["count"] * predicted ** 2).sum())
+
+
+def cross_validate(stats, le_country, le_education, params, random_state=RANDOM_STATE):
+    """Row-level cross-validated MSE, computed from the per-fold statistics"""
+    error = 0.0
+    for fold in np.unique(stats.index.get_level_values("Fold")):
+        model = fit_cells(cells_of(stats, exclude=fold), le_country, le_education, params, random_state)
+        error += squared_error(model, cells_of(stats, folds=[fold]), le_country, le_education)
+    return error / stats["count"].sum()
+
+
+def search_cells(stats, le_country, le_education, max_depth, random_state=RANDOM_STATE):
+    """Best max_depth by cross-validated MSE"""
+    scores = {depth: cross_validate(stats, le_country, le_education, {"max_depth": depth}, random_state)
+              for depth in max_depth}
+    best = min(scores, key=scores.get)
+    return {"family": "tree", "best_params": {"max_depth": best}, "cv_rmse": float(np.sqrt(scores[best]))}
+
+
+def cube_leaf_quantiles(model, cube, le_country, le_education, quantiles=QUANTILES):
+    """Salary quantiles per leaf, indexed by node id, from the cube's per-cell histograms"""
+    cells = cube.cells
+    leaves = model.apply(cell_matrix(cells, le_country, le_education))
+    hist = pd.DataFrame(cells[BIN_COLUMNS].to_numpy(), index=leaves).groupby(level=0).sum()
+    result = np.full((model.tree_.node_count, len(quantiles)), np.nan)
+    for k, q in enumerate(quantiles):
+        result[hist.index.to_numpy(), k] = histogram_quantile(hist.to_numpy(), q)
+    return result
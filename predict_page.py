@@ -1,18 +1,77 @@
 import streamlit as st
-import pickle
-import numpy as np
-
-
-def load_model():
-    with open('saved_steps.pkl', 'rb') as file:
-        data = pickle.load(file)
-    return data
+import math
+import time
+import pandas as pd
+from model_store import get_model_store
+from result_cache import ResultCache
+from salary_model import FEATURE_COLUMNS
+
+# Industry averages used for the salary comparison (these are example values)
+INDUSTRY_AVERAGES = {
+    "Tech": 95000,
+    "Finance": 105000,
+    "Healthcare": 85000,
+    "Education": 75000,
+    "Other": 80000
+}
+
+# Shared by every session in the process; cleared whenever the model reloads
+prediction_cache = ResultCache(max_entries=4096, ttl=3600)
+get_model_store().on_reload(lambda predictor: prediction_cache.clear())
+
+
+def get_predictor():
+    # Loaded on first use and swapped in the background when the model file changes
+    return get_model_store().get()
+
+
+def compute_salary_summary(annual_salary, industry, interval=None):
+    """Derive every number and chart shown for one prediction"""
+    monthly_salary = annual_salary / 12
+
+    # Create a DataFrame for the breakdown chart
+    chart_data = pd.DataFrame({
+        'Amount': [monthly_salary * 0.65, monthly_salary * 0.25, monthly_salary * 0.10],
+        'Category': ['Take Home Pay', 'Taxes (est.)', 'Benefits (est.)']
+    })
+
+    # Compare with the selected industry's average
+    industry_avg = INDUSTRY_AVERAGES.get(industry, 85000)
+    difference = annual_salary - industry_avg
+
+    # Projected salaries for the next 5 years (assuming 5% annual growth)
+    years = list(range(1, 6))
+    projection_data = pd.DataFrame({
+        'Year': [f"Year {year}" for year in years],
+        'Projected Salary': [annual_salary * (1.05 ** year) for year in years]
+    })
+
+    return {
+        "annual": annual_salary,
+        "monthly": monthly_salary,
+        "hourly": annual_salary / (52 * 40),  # Assuming 52 weeks per year and 40 hours per week
+        "weekly": annual_salary / 52,
+        "chart_data": chart_data,
+        "industry_avg": industry_avg,
+        "difference": difference,
+        "percentage_diff": (difference / industry_avg) * 100,
+        "projection_data": projection_data,
+        # (p10, p50, p90) of similar developers, if the model bundle has it
+        "interval": interval,
+    }
 
-data = load_model()
 
-regressor = data["model"]
-le_country = data["le_country"]
-le_education = data["le_education"]
+def get_salary_summary(country, education, experience, industry):
+    predictor = get_predictor()
+    key = (predictor.version, country, education, experience, industry)
+    summary = prediction_cache.get(key)
+    if summary is None:
+        # Served from the precomputed table; off-grid inputs use the model directly
+        annual_salary = predictor.predict(country, education, experience)
+        interval = predictor.predict_interval(country, education, experience)
+        summary = compute_salary_summary(annual_salary, industry, interval)
+        prediction_cache.put(key, summary)
+    return summary
 
 def show_predict_page():
     # Import and apply the dropdown fix
@@ -101,15 +160,13 @@ def show_predict_page():
     st.write(f"Industry: {industry}")
 
     if ok:
-        X = np.array([[country, education, expericence ]])
-        X[:, 0] = le_country.transform(X[:,0])
-        X[:, 1] = le_education.transform(X[:,1])
-        X = X.astype(float)
-
-        salary = regressor.predict(X)
-        annual_salary = salary[0]
-        monthly_salary = annual_salary / 12
-        hourly_salary = annual_salary / (52 * 40)  # Assuming 52 weeks per year and 40 hours per week
+        summary = get_salary_summary(country, education, expericence, industry)
+        annual_salary = summary["annual"]
+        if math.isnan(annual_salary):
+            st.error(f"The current model has no data for {country} / {education}.")
+            return
+        monthly_salary = summary["monthly"]
+        hourly_salary = summary["hourly"]
 
         # Display the salary information with a nice format
         st.subheader("Salary Breakdown")
@@ -123,7 +180,13 @@ def show_predict_page():
 
         with col2:
             st.metric(label="Hourly Rate", value=f"${hourly_salary:.2f}")
-            st.metric(label="Weekly Salary", value=f"${annual_salary/52:.2f}")
+            st.metric(label="Weekly Salary", value=f"${summary['weekly']:.2f}")
+
+        # Show the likely range from the salaries of similar developers in the training data
+        if summary["interval"] is not None:
+            low, median, high = summary["interval"]
+            st.write(f"**Likely range:** ${low:,.0f} – ${high:,.0f} (median ${median:,.0f})")
+            st.caption("80% of similar developers in the survey earn within this range.")
 
         # Add some additional context
         st.info("""
@@ -139,22 +202,8 @@ def show_predict_page():
         # Add a visual representation of the salary breakdown
         st.subheader("Salary Visualization")
 
-        # Create data for the chart
-        import pandas as pd
-
-        # Calculate values for visualization
-        take_home = monthly_salary * 0.65
-        taxes = monthly_salary * 0.25
-        benefits = monthly_salary * 0.10
-
-        # Create a DataFrame for the chart
-        chart_data = pd.DataFrame({
-            'Amount': [take_home, taxes, benefits],
-            'Category': ['Take Home Pay', 'Taxes (est.)', 'Benefits (est.)']
-        })
-
         # Display the bar chart
-        st.bar_chart(chart_data, y='Amount')
+        st.bar_chart(summary["chart_data"], y='Amount')
 
         # Add explanation of the visualization
         st.caption("""
@@ -166,21 +215,10 @@ def show_predict_page():
         st.markdown("---")
         st.subheader("Salary Comparison")
 
-        # Create a simple comparison with industry averages (these are example values)
-        industry_averages = {
-            "Tech": 95000,
-            "Finance": 105000,
-            "Healthcare": 85000,
-            "Education": 75000,
-            "Other": 80000
-        }
-
-        # Get the average for the selected industry
-        selected_industry_avg = industry_averages.get(industry, 85000)
-
-        # Calculate the difference
-        difference = annual_salary - selected_industry_avg
-        percentage_diff = (difference / selected_industry_avg) * 100
+        # Compare with the selected industry's average
+        selected_industry_avg = summary["industry_avg"]
+        difference = summary["difference"]
+        percentage_diff = summary["percentage_diff"]
 
         # Display the comparison
         col1, col2 = st.columns(2)
@@ -210,18 +248,8 @@ def show_predict_page():
         st.markdown("---")
         st.subheader("Future Salary Projection")
 
-        # Calculate projected salaries for the next 5 years (assuming 5% annual growth)
-        years = list(range(1, 6))
-        projected_salaries = [annual_salary * (1.05 ** year) for year in years]
-
-        # Create a DataFrame for the projection chart
-        projection_data = pd.DataFrame({
-            'Year': [f"Year {year}" for year in years],
-            'Projected Salary': projected_salaries
-        })
-
         # Display the projection chart
-        st.line_chart(projection_data, x='Year', y='Projected Salary')
+        st.line_chart(summary["projection_data"], x='Year', y='Projected Salary')
 
         # Add explanation of the projection
         st.caption("""
@@ -238,3 +266,41 @@ def show_predict_page():
         - Be prepared to discuss your achievements and value to the company
         - Practice your negotiation conversation beforehand
         """)
+
+    # Batch mode for pricing whole teams at once
+    st.markdown("---")
+    show_batch_prediction()
+
+
+def show_batch_prediction():
+    st.subheader("Batch Salary Prediction")
+    st.write(f"Upload a CSV file with the columns {', '.join(FEATURE_COLUMNS)} to predict every row at once.")
+
+    uploaded_file = st.file_uploader("Upload CSV", type=["csv"], key="batch_csv")
+    if uploaded_file is None:
+        return
+
+    try:
+        batch = pd.read_csv(uploaded_file)
+        start = time.perf_counter()
+        result = get_predictor().predict_frame(batch)
+        elapsed = time.perf_counter() - start
+    except ValueError as e:
+        st.error(f"Could not predict the uploaded file: {e}")
+        return
+
+    rows_per_second = len(result) / elapsed if elapsed > 0 else float("inf")
+    st.success(f"Predicted {len(result):,} rows in {elapsed * 1000:.1f} ms ({rows_per_second:,.0f} rows/s)")
+
+    # Unknown categories or non-numeric experience leave the salary empty
+    skipped = int(result["Salary"].isna().sum())
+    if skipped:
+        st.warning(f"{skipped:,} rows have an unknown Country / EdLevel or invalid YearsCodePro and were not predicted.")
+    st.dataframe(result.head(100))
+
+    st.download_button(
+        label="Download Predictions",
+        data=result.to_csv(index=False),
+        file_name="salary_predictions.csv",
+        mime="text/csv"
+    )
@@ -0,0 +1,242 @@
+"""
+Headless salary prediction service.
+
+A plain ASGI application around the saved model bundle, so other systems
+can get predictions without driving the Streamlit UI. Concurrent requests are
+gathered into micro-batches and each batch is served by one regressor.predict
+call.
+
+Run it with any ASGI server, for example:
+
+    uvicorn prediction_service:app --workers 2
+
+Endpoints:
+    GET  /health   -> {"status": "ok", "pending": <queued rows>}
+    POST /predict  -> body is one row or a list of rows with the keys
+                      Country, EdLevel and YearsCodePro; the response holds
+                      {"salaries": [...]} in the same order
+"""
+import asyncio
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from model_store import ModelStore
+from salary_model import FEATURE_COLUMNS
+
+# Service configuration, overridable through the environment
+# Model artifact to serve; by default the array bundle if present, else saved_steps.pkl
+MODEL_PATH = os.environ.get("SALARY_MODEL_FILE")
+# Largest number of rows sent to the regressor in one call
+MAX_BATCH_SIZE = int(os.environ.get("SALARY_MAX_BATCH_SIZE", "512"))
+# How long the first request of a batch waits for others to join, in milliseconds
+MAX_BATCH_WAIT_MS = float(os.environ.get("SALARY_BATCH_WAIT_MS", "5"))
+
+
+class MicroBatcher:
+    def __init__(self, store, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_BATCH_WAIT_MS):
+        """Collect rows from concurrent callers and predict them together"""
+        self.store = store
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.pending_rows = 0
+        self._worker = None
+
+    def start(self):
+        """Start the background batching task on the running event loop"""
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Cancel the batching task"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def validate(self, frame):
+        """Return an error message if frame cannot be encoded by the model, else None"""
+        missing = [column for column in FEATURE_COLUMNS if column not in frame.columns]
+        if missing:
+            return f"Missing required fields: {', '.join(missing)}"
+        null = [column for column in FEATURE_COLUMNS if frame[column].isna().any()]
+        if null:
+            return f"Fields must not be null: {', '.join(null)}"
+
+        # Reject unknown labels per request, so one bad caller cannot fail a whole batch
+        unknown = self.store.get().unknown_labels(frame)
+        if unknown:
+            return "; ".join(f"Unknown {column} value(s): {', '.join(values)}" for column, values in unknown.items())
+
+        years = pd.to_numeric(frame["YearsCodePro"], errors="coerce")
+        if years.isna().any():
+            return "YearsCodePro must be numeric"
+        # JSON numbers such as 1e400 parse to inf, which the regressor rejects
+        if not np.isfinite(years).all() or (years < 0).any():
+            return "YearsCodePro must be a finite number of at least 0"
+        return None
+
+    async def predict(self, frame):
+        """Queue a validated frame and wait for its salaries"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self.pending_rows += len(frame)
+        await self.queue.put((frame, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Block until there is work, then keep collecting until the batch
+            # is full or the latency window closes
+            batch = [await self.queue.get()]
+            size = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            frames = [frame for frame, _ in batch]
+            self.pending_rows -= size
+            try:
+                # The regressor releases the event loop while it runs
+                salaries = await loop.run_in_executor(None, self._predict_batch, frames)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for frame, future in batch:
+                if not future.done():
+                    future.set_result(salaries[offset:offset + len(frame)])
+                offset += len(frame)
+
+    def _predict_batch(self, frames):
+        # One model snapshot per batch, even if a reload lands meanwhile
+        predictor = self.store.get()
+        return predictor.predict_encoded(predictor.encode(pd.concat(frames, ignore_index=True)))
+
+
+batcher = None
+
+
+def get_batcher():
+    """Return the process-wide batcher; its model store hot-reloads the artifact"""
+    global batcher
+    if batcher is None:
+        batcher = MicroBatcher(ModelStore(MODEL_PATH))
+    return batcher
+
+
+async def read_body(receive):
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def send_json(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def handle_lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                # Load the model up front so the first request does not pay for it
+                get_batcher().store.get()
+                get_batcher().start()
+            except Exception as e:
+                await send({"type": "lifespan.startup.failed", "message": str(e)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if batcher is not None:
+                await batcher.stop()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope["type"] == "lifespan":
+        await handle_lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    path = scope["path"].rstrip("/")
+    method = scope["method"]
+
+    if path == "/health" and method == "GET":
+        await send_json(send, 200, {"status": "ok", "pending": get_batcher().pending_rows})
+        return
+
+    if path != "/predict":
+        await send_json(send, 404, {"error": "Not found"})
+        return
+    if method != "POST":
+        await send_json(send, 405, {"error": "Use POST"})
+        return
+
+    try:
+        payload = json.loads(await read_body(receive) or b"null")
+    except ValueError:
+        await send_json(send, 400, {"error": "Body must be valid JSON"})
+        return
+
+    rows = [payload] if isinstance(payload, dict) else payload
+    if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+        await send_json(send, 400, {"error": "Body must be a row object or a non-empty list of rows"})
+        return
+
+    service = get_batcher()
+    frame = pd.DataFrame(rows)
+    try:
+        error = service.validate(frame)
+    except (TypeError, ValueError, KeyError) as e:
+        error = f"Invalid rows: {e}"
+    except Exception as e:
+        await send_json(send, 500, {"error": f"Validation failed: {e}"})
+        return
+    if error:
+        await send_json(send, 400, {"error": error})
+        return
+
+    frame = frame[FEATURE_COLUMNS].copy()
+    frame["YearsCodePro"] = pd.to_numeric(frame["YearsCodePro"])
+    try:
+        salaries = await service.predict(frame)
+    except Exception as e:
+        await send_json(send, 500, {"error": f"Prediction failed: {e}"})
+        return
+
+    await send_json(send, 200, {"salaries": salaries.tolist()})
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+# Survey answers for YearsCodePro that are not plain numbers
+EXPERIENCE_MAP = {
+    'More than 50 years': 50,
+    'Less than 1 year': 0.5,
+}
+
+
+def shorten_categories(categories, cutoff):
+    """Map every category of a value_counts() result to itself, or to 'Other' below cutoff"""
+    mapped = np.where(categories.to_numpy() >= cutoff, categories.index.to_numpy(dtype=object), 'Other')
+    return dict(zip(categories.index, mapped))
+
+
+def clean_experience(values):
+    """Convert a YearsCodePro Series to float years"""
+    # Only a few dozen distinct answers: convert those once, then map the codes
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques)
+    # Text answers come from the mapping table, everything else must parse as a number
+    mapped = uniques.map(EXPERIENCE_MAP)
+    years = mapped.fillna(pd.to_numeric(uniques.where(mapped.isna()), errors="raise")).to_numpy(dtype=float)
+    # Missing answers (code -1) stay NaN
+    return pd.Series(np.append(years, np.nan)[codes], index=values.index, name=values.name)
+
+
+def education_level(x):
+    if 'Bachelor’s degree' in x:
+        return 'Bachelor’s degree'
+    if 'Master’s degree' in x:
+        return 'Master’s degree'
+    if 'Professional degree' in x or 'Other doctoral' in x:
+        return 'Post grad'
+    return 'Less than a Bachelors'
+
+
+def clean_education(values):
+    """Collapse an EdLevel Series into the four education levels the model uses"""
+    # The survey has a handful of distinct answers: classify each once and
+    # map the factorized codes back to rows
+    codes, uniques = pd.factorize(values)
+    if (codes < 0).any():
+        raise ValueError("EdLevel contains missing values")
+    levels = np.array([education_level(value) for value in uniques], dtype=object)
+    return pd.Series(levels[codes], index=values.index, name=values.name)
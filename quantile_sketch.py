@@ -0,0 +1,152 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+# Accuracy parameter of the sketches; rank error is roughly 1.7 / K
+DEFAULT_K = 200
+# Quantiles shown on the Explore page
+SKETCH_QUANTILES = (0.5, 0.9)
+
+
+class KLLSketch:
+    def __init__(self, k=DEFAULT_K, seed=None):
+        """Mergeable KLL quantile sketch: constant memory for any number of values"""
+        self.k = k
+        self.n = 0
+        self.levels = []
+        self._rng = np.random.default_rng(seed)
+        self._grow()
+
+    def _grow(self):
+        self.levels.append(np.empty(0))
+        self.max_size = sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def _capacity(self, level):
+        # Lower levels get geometrically smaller buffers
+        depth = len(self.levels) - level - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def _size(self):
+        return sum(len(items) for items in self.levels)
+
+    def _compress(self):
+        while self._size() >= self.max_size:
+            for level in range(len(self.levels)):
+                items = self.levels[level]
+                if len(items) < self._capacity(level):
+                    continue
+                if level + 1 >= len(self.levels):
+                    self._grow()
+                # Keep every other sorted item (random offset) at twice the weight
+                items = np.sort(items)
+                odd = len(items) % 2
+                offset = odd + int(self._rng.random() < 0.5)
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[offset::2]])
+                self.levels[level] = items[:odd]
+                break
+
+    def update(self, values):
+        """Add a scalar or an array of values"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch in, e.g. from another chunk, year or process"""
+        while len(self.levels) < len(other.levels):
+            self._grow()
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """Approximate q-quantile of every value added so far (NaN if empty)"""
+        if self.n == 0:
+            return float("nan")
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(items[order][min(position, len(items) - 1)])
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "levels": [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, state, seed=None):
+        sketch = cls(state["k"], seed=seed)
+        sketch.levels = []
+        for items in state["levels"]:
+            sketch._grow()
+            sketch.levels[-1] = np.asarray(items, dtype=np.float64)
+        sketch.n = state["n"]
+        return sketch
+
+
+class GroupSketches:
+    def __init__(self, by=("Country", "YearsCodePro"), k=DEFAULT_K):
+        """One KLL salary sketch per value of each grouping column"""
+        self.by = tuple(by)
+        self.k = k
+        self.sketches = {column: {} for column in self.by}
+
+    def update(self, df, value="Salary"):
+        for column in self.by:
+            groups = self.sketches[column]
+            for group, values in df.groupby(column, observed=True, sort=False)[value]:
+                key = str(group)
+                if key not in groups:
+                    groups[key] = KLLSketch(self.k)
+                groups[key].update(values.to_numpy())
+        return self
+
+    def merge(self, other):
+        for column in self.by:
+            groups = self.sketches[column]
+            for key, sketch in other.sketches.get(column, {}).items():
+                if key in groups:
+                    groups[key].merge(sketch)
+                else:
+                    groups[key] = KLLSketch.from_dict(sketch.to_dict())
+        return self
+
+    def quantiles(self, column, quantiles=SKETCH_QUANTILES):
+        """Frame of approximate salary quantiles per group of column"""
+        groups = self.sketches[column]
+        data = {f"p{int(q * 100)}": [sketch.quantile(q) for sketch in groups.values()] for q in quantiles}
+        data["count"] = [sketch.n for sketch in groups.values()]
+        return pd.DataFrame(data, index=pd.Index(list(groups), name=column))
+
+    def to_dict(self):
+        return {
+            "k": self.k,
+            "by": list(self.by),
+            "sketches": {column: {key: sketch.to_dict() for key, sketch in groups.items()}
+                         for column, groups in self.sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        group_sketches = cls(state["by"], state["k"])
+        for column, groups in state["sketches"].items():
+            group_sketches.sketches[column] = {key: KLLSketch.from_dict(sketch) for key, sketch in groups.items()}
+        return group_sketches
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
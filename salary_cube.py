@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+# Dimensions of the cube, one cell per combination present in the data
+DIMENSIONS = ["Country", "EdLevel", "YearsCodePro"]
+# Salary histogram per cell, for the Explore page histogram and the leaf
+# intervals of out-of-core training; the cleaned survey only keeps salaries
+# between 10,000 and 250,000
+SALARY_MIN = 10000
+SALARY_MAX = 250000
+BIN_WIDTH = 1000
+N_BINS = (SALARY_MAX - SALARY_MIN) // BIN_WIDTH
+BIN_COLUMNS = [f"bin_{i}" for i in range(N_BINS)]
+
+
+def salary_bins(salary):
+    """Histogram bin of every salary; out-of-range values go to the edge bins"""
+    codes = (np.asarray(salary, dtype=float) - SALARY_MIN) // BIN_WIDTH
+    return np.clip(codes, 0, N_BINS - 1).astype(np.intp)
+
+
+def histogram_series(counts, bin_width=BIN_WIDTH):
+    """Bin counts merged into bins of bin_width (a multiple of BIN_WIDTH), indexed by lower edge"""
+    factor = bin_width // BIN_WIDTH
+    if bin_width % BIN_WIDTH or N_BINS % factor:
+        raise ValueError(f"bin_width must be a multiple of {BIN_WIDTH} that divides {N_BINS * BIN_WIDTH}")
+    counts = np.asarray(counts).reshape(-1, factor).sum(axis=1)
+    edges = SALARY_MIN + np.arange(len(counts)) * bin_width
+    return pd.Series(counts, index=pd.Index(edges, name="Salary"), name="count")
+
+
+def histogram_quantile(hist, q):
+    """Approximate salary quantile of every row of a (groups, N_BINS) histogram, interpolated within bins"""
+    hist = np.asarray(hist, dtype=float)
+    cumulative = hist.cumsum(axis=1)
+    target = q * cumulative[:, -1]
+
+    rows = np.arange(len(hist))
+    bins = np.minimum((cumulative < target[:, None]).sum(axis=1), N_BINS - 1)
+    below = np.where(bins > 0, cumulative[rows, np.maximum(bins - 1, 0)], 0)
+    in_bin = hist[rows, bins]
+    fraction = np.divide(target - below, in_bin, out=np.zeros(len(hist)), where=in_bin > 0)
+    return SALARY_MIN + (bins + fraction) * BIN_WIDTH
+
+
+class SalaryCube:
+    def __init__(self, cells):
+        """Count / sum and a salary histogram per (Country, EdLevel, YearsCodePro)"""
+        self.cells = cells
+        # Cubes are immutable, so every rollup is computed once
+        self._rollups = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        """Aggregate cleaned survey rows into a cube"""
+        salary = df["Salary"].to_numpy(dtype=float)
+        keys = df[DIMENSIONS].reset_index(drop=True)
+        codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+
+        n_cells = len(uniques)
+        uniques.names = DIMENSIONS
+        stats = pd.DataFrame({
+            "count": np.bincount(codes, minlength=n_cells),
+            "sum": np.bincount(codes, weights=salary, minlength=n_cells),
+        }, index=uniques)
+
+        # One flat bincount over (cell, bin) pairs fills the whole histogram
+        hist = np.bincount(codes * N_BINS + salary_bins(salary), minlength=n_cells * N_BINS)
+        hist = pd.DataFrame(hist.reshape(n_cells, N_BINS), columns=BIN_COLUMNS, index=uniques)
+        return cls(pd.concat([stats, hist], axis=1))
+
+    def merge(self, other):
+        """Combine two cubes, e.g. built from different chunks of the same survey"""
+        cells = pd.concat([self.cells, other.cells]).groupby(level=DIMENSIONS, sort=False).sum()
+        return SalaryCube(cells)
+
+    def rollup(self, by, columns=None):
+        """Aggregate the cells (or only the given columns) over the given dimension(s)"""
+        key = (tuple(by) if isinstance(by, list) else by, tuple(columns) if columns else None)
+        if key not in self._rollups:
+            cells = self.cells if columns is None else self.cells[columns]
+            self._rollups[key] = cells.groupby(level=by, sort=False).sum()
+        return self._rollups[key]
+
+    def counts(self, by):
+        """Rows per group, ordered like value_counts()"""
+        return self.rollup(by, ["count"])["count"].sort_values(ascending=False)
+
+    def mean(self, by):
+        rolled = self.rollup(by, ["count", "sum"])
+        return rolled["sum"] / rolled["count"]
+
+    def histogram(self):
+        """Salary bin counts over every cell"""
+        if "histogram" not in self._rollups:
+            self._rollups["histogram"] = self.cells[BIN_COLUMNS].to_numpy().sum(axis=0)
+        return self._rollups["histogram"]
+
+    def save(self, path):
+        self.cells.reset_index().to_parquet(path, index=False)
+
+    @classmethod
+    def load(cls, path):
+        return cls(pd.read_parquet(path).set_index(DIMENSIONS))
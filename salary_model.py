@@ -0,0 +1,125 @@
+import os
+import pickle
+import threading
+import numpy as np
+import pandas as pd
+from model_bundle import BUNDLE_DIR, MANIFEST_FILE, load_bundle
+
+# Pickled bundle written by the export cell of SalaryPrediction.ipynb
+MODEL_FILE = "saved_steps.pkl"
+# Feature columns in the order the regressor was trained on
+FEATURE_COLUMNS = ["Country", "EdLevel", "YearsCodePro"]
+
+
+def model_artifact():
+    """Path of the model artifact in use: the array bundle if present, else the pickle"""
+    if os.path.exists(os.path.join(BUNDLE_DIR, MANIFEST_FILE)):
+        return BUNDLE_DIR
+    return MODEL_FILE
+
+
+def load_model(path=None, verify=False):
+    """Load the model / le_country / le_education bundle; verify hashes every bundle array"""
+    if path is None:
+        path = model_artifact()
+    # Array bundles are memory-mapped and need no scikit-learn import
+    if os.path.isdir(path):
+        return load_bundle(path, verify=verify)
+    with open(path, 'rb') as file:
+        data = pickle.load(file)
+    return data
+
+
+class Predictor:
+    def __init__(self, data, max_experience=50, version=None):
+        """Encode and predict with one loaded model; shared by the page, batch and API paths"""
+        self.data = data
+        self.model = data["model"]
+        self.version = version
+        self.max_experience = max_experience
+
+        # LabelEncoder codes are positions in the sorted classes_ array, so plain
+        # dicts replace its per-call sorted-array search
+        self.country_codes = {str(country): i for i, country in enumerate(data["le_country"].classes_)}
+        self.education_codes = {str(education): i for i, education in enumerate(data["le_education"].classes_)}
+        self._local = threading.local()
+
+        # Prediction for every integer (country, education, experience) input
+        shape = (len(self.country_codes), len(self.education_codes), max_experience + 1)
+        grid = np.indices(shape).reshape(len(shape), -1).T.astype(float)
+        self.table = np.asarray(self.model.predict(grid), dtype=float).reshape(shape)
+
+        # Salary quantiles of the leaf each input lands in, when the bundle has them
+        self.leaf_quantiles = data.get("leaf_quantiles")
+        self.interval_table = None
+        if self.leaf_quantiles is not None:
+            leaves = self.model.apply(grid)
+            self.interval_table = np.asarray(self.leaf_quantiles)[leaves].reshape(shape + (-1,))
+
+    def unknown_labels(self, df):
+        """Map each categorical column to the values the model has never seen; nulls are not labels and are skipped"""
+        unknown = {}
+        for column, codes in (("Country", self.country_codes), ("EdLevel", self.education_codes)):
+            values = sorted(set(df[column].dropna().astype(str)) - codes.keys())
+            if values:
+                unknown[column] = values
+        return unknown
+
+    def encode(self, df, out=None):
+        """Encode a frame into a float feature matrix; unknown or invalid values become NaN"""
+        missing = [column for column in FEATURE_COLUMNS if column not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+        X = out if out is not None else np.empty((len(df), len(FEATURE_COLUMNS)), dtype=float)
+        X[:, 0] = df["Country"].map(self.country_codes).to_numpy(dtype=float, na_value=np.nan)
+        X[:, 1] = df["EdLevel"].map(self.education_codes).to_numpy(dtype=float, na_value=np.nan)
+        X[:, 2] = pd.to_numeric(df["YearsCodePro"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        return X
+
+    def predict_encoded(self, X):
+        """Predict encoded rows with one model call; rows containing NaN get a NaN salary"""
+        salaries = np.full(len(X), np.nan)
+        valid = ~np.isnan(X).any(axis=1)
+        if valid.all():
+            salaries[:] = self.model.predict(X)
+        elif valid.any():
+            salaries[valid] = self.model.predict(X[valid])
+        return salaries
+
+    def predict_frame(self, df):
+        """Return a copy of df with a Salary column predicted for every row"""
+        result = df.copy()
+        result["Salary"] = self.predict_encoded(self.encode(df))
+        return result
+
+    def predict(self, country, education, experience):
+        """One salary from the table; off-grid experience uses the model, unknown labels give NaN"""
+        i = self.country_codes.get(country)
+        j = self.education_codes.get(education)
+        if i is None or j is None:
+            return float("nan")
+        if float(experience).is_integer() and 0 <= experience <= self.max_experience:
+            return float(self.table[i, j, int(experience)])
+
+        # Reuse one row buffer per thread instead of allocating per call
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = self._local.row = np.empty((1, len(FEATURE_COLUMNS)), dtype=float)
+        row[0] = (i, j, experience)
+        return float(self.model.predict(row)[0])
+
+    def predict_interval(self, country, education, experience):
+        """(p10, p50, p90) salary of the training rows in the prediction's leaf, or None"""
+        if self.interval_table is None:
+            return None
+        i = self.country_codes.get(country)
+        j = self.education_codes.get(education)
+        if i is None or j is None:
+            return None
+        if float(experience).is_integer() and 0 <= experience <= self.max_experience:
+            return tuple(float(v) for v in self.interval_table[i, j, int(experience)])
+
+        row = np.array([[i, j, experience]], dtype=float)
+        leaf = self.model.apply(row)[0]
+        return tuple(float(v) for v in self.leaf_quantiles[leaf])
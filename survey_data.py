@@ -0,0 +1,366 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from preprocessing import clean_education, clean_experience, shorten_categories
+from quantile_sketch import GroupSketches
+from salary_cube import SalaryCube
+
+# Raw Stack Overflow survey export the app was built on
+SURVEY_FILE = "survey_results_public.csv"
+# Exports of every year live in surveys/<year>/survey_results_public.csv
+SURVEY_DIR = "surveys"
+DEFAULT_YEAR = 2020
+# Cleaned frames are cached here as Parquet, shared by every worker process,
+# with one partition directory per survey year
+CACHE_DIR = "data_cache"
+PARTITION_DIR = os.path.join(CACHE_DIR, "survey")
+# Bump whenever clean_survey changes its output, so stale caches are rebuilt
+CLEANING_VERSION = 2
+# Rows per chunk when streaming the CSV
+CHUNK_SIZE = 100_000
+# Countries with fewer full-time respondents are dropped
+COUNTRY_CUTOFF = 400
+
+# The only raw columns the app needs, read with explicit dtypes
+SURVEY_COLUMNS = ["Country", "EdLevel", "YearsCodePro", "Employment", "ConvertedComp"]
+SURVEY_DTYPES = {
+    "Country": str,
+    "EdLevel": str,
+    "YearsCodePro": str,
+    "Employment": str,
+    "ConvertedComp": "float64",
+}
+
+# Canonical column -> raw column name of each survey year, plus the raw value
+# meaning full-time employment and any experience answers that are not numbers
+_CONVERTED_COMP = {"Country": "Country", "EdLevel": "EdLevel", "YearsCodePro": "YearsCodePro",
+                   "Employment": "Employment", "ConvertedComp": "ConvertedComp"}
+_CONVERTED_COMP_YEARLY = dict(_CONVERTED_COMP, ConvertedComp="ConvertedCompYearly")
+YEAR_SCHEMAS = {
+    2018: {
+        "columns": {"Country": "Country", "EdLevel": "FormalEducation", "YearsCodePro": "YearsCodingProf",
+                    "Employment": "Employment", "ConvertedComp": "ConvertedSalary"},
+        "full_time": "Employed full-time",
+        # 2018 asked for ranges; use the middle of each
+        "experience": {
+            "0-2 years": 1, "3-5 years": 4, "6-8 years": 7, "9-11 years": 10, "12-14 years": 13,
+            "15-17 years": 16, "18-20 years": 19, "21-23 years": 22, "24-26 years": 25,
+            "27-29 years": 28, "30 or more years": 30,
+        },
+    },
+    2019: {"columns": _CONVERTED_COMP, "full_time": "Employed full-time"},
+    2020: {"columns": _CONVERTED_COMP, "full_time": "Employed full-time"},
+    2021: {"columns": _CONVERTED_COMP_YEARLY, "full_time": "Employed full-time"},
+    2022: {"columns": _CONVERTED_COMP_YEARLY, "full_time": "Employed, full-time"},
+    2023: {"columns": _CONVERTED_COMP_YEARLY, "full_time": "Employed, full-time"},
+    2024: {"columns": _CONVERTED_COMP_YEARLY, "full_time": "Employed, full-time"},
+    2025: {"columns": _CONVERTED_COMP_YEARLY, "full_time": "Employed, full-time"},
+}
+
+CLEAN_SCHEMA = pa.schema([
+    ("Country", pa.string()),
+    ("EdLevel", pa.string()),
+    ("YearsCodePro", pa.float64()),
+    ("Salary", pa.float64()),
+])
+
+
+def normalize_chunk(df, schema):
+    """Rename a raw chunk of any survey year to the canonical columns and values"""
+    df = df.rename(columns={raw: column for column, raw in schema["columns"].items()})
+    # Employment is multi-select from 2022 ("Employed, full-time;Independent
+    # contractor, ..."), so any answer that includes full-time counts
+    answers = ";" + df["Employment"].astype(str) + ";"
+    full_time = answers.str.contains(f";{schema['full_time']};", regex=False, na=False)
+    df["Employment"] = df["Employment"].mask(full_time, "Employed full-time")
+    if "experience" in schema:
+        # Kept as text; clean_experience parses it like every other answer
+        df["YearsCodePro"] = df["YearsCodePro"].replace(
+            {answer: str(years) for answer, years in schema["experience"].items()})
+    return df
+
+
+def clean_chunk(df):
+    """Row-local part of the cleaning; also returns the per-country counts the cutoff is based on"""
+    df = df[df["ConvertedComp"].notnull()]
+    df = df.dropna()
+    df = df[df["Employment"] == "Employed full-time"]
+    df = df.drop("Employment", axis=1)
+
+    # Countries are shortened on counts taken before the salary range filter
+    country_counts = df["Country"].value_counts()
+    df = df[(df["ConvertedComp"] <= 250000) & (df["ConvertedComp"] >= 10000)].copy()
+
+    df["YearsCodePro"] = clean_experience(df["YearsCodePro"])
+    df["EdLevel"] = clean_education(df["EdLevel"])
+    df = df.rename({"ConvertedComp": "Salary"}, axis=1)
+    return df, country_counts
+
+
+def kept_countries(country_counts, cutoff=COUNTRY_CUTOFF):
+    """Countries with enough respondents to keep; the rest would be mapped to 'Other' and dropped"""
+    country_map = shorten_categories(country_counts, cutoff)
+    return [country for country, mapped in country_map.items() if mapped != "Other"]
+
+
+def clean_survey(df):
+    """Filter and clean the raw survey into Country / EdLevel / YearsCodePro / Salary"""
+    df, country_counts = clean_chunk(df[SURVEY_COLUMNS])
+    return df[df["Country"].isin(kept_countries(country_counts))]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def ingest_survey(path, output, chunksize=CHUNK_SIZE, cube_output=None, year=DEFAULT_YEAR, sketch_output=None):
+    """Stream the CSV in fixed-size chunks into a cleaned Parquet file with bounded memory"""
+    schema = YEAR_SCHEMAS[year]
+    columns = schema["columns"]
+    start = time.perf_counter()
+    rows_read = 0
+    country_counts = pd.Series(dtype="int64")
+    staging = f"{output}.{os.getpid()}.staging"
+
+    # Pass 1: read only the needed columns with explicit dtypes, clean each
+    # chunk and append it; only the per-country counts are kept in memory
+    writer = pq.ParquetWriter(staging, CLEAN_SCHEMA)
+    try:
+        reader = pd.read_csv(
+            path,
+            usecols=[columns[column] for column in SURVEY_COLUMNS],
+            dtype={columns[column]: dtype for column, dtype in SURVEY_DTYPES.items()},
+            chunksize=chunksize,
+        )
+        for chunk in reader:
+            rows_read += len(chunk)
+            cleaned, counts = clean_chunk(normalize_chunk(chunk, schema))
+            country_counts = country_counts.add(counts, fill_value=0)
+            writer.write_table(pa.Table.from_pandas(cleaned, schema=CLEAN_SCHEMA, preserve_index=False))
+    finally:
+        writer.close()
+
+    # Pass 2: the country cutoff needs the totals, so filter the (much smaller)
+    # staged rows one row group at a time; the salary cube and the quantile
+    # sketches are aggregated on the way
+    keep = pa.array(kept_countries(country_counts), type=pa.string())
+    rows_written = 0
+    cube = None
+    sketches = GroupSketches()
+
+    def write(tmp_path):
+        nonlocal rows_written, cube
+        staged = pq.ParquetFile(staging)
+        with pq.ParquetWriter(tmp_path, CLEAN_SCHEMA) as final:
+            for i in range(staged.num_row_groups):
+                table = staged.read_row_group(i)
+                table = table.filter(pc.is_in(table["Country"], value_set=keep))
+                rows_written += table.num_rows
+                final.write_table(table)
+                if cube_output is None and sketch_output is None:
+                    continue
+                rows = table.to_pandas()
+                if cube_output is not None:
+                    part = SalaryCube.from_frame(rows)
+                    cube = part if cube is None else cube.merge(part)
+                if sketch_output is not None:
+                    sketches.update(rows)
+
+    try:
+        _write_atomic(output, write)
+    finally:
+        os.remove(staging)
+    if cube_output is not None:
+        if cube is None:
+            cube = SalaryCube.from_frame(pd.DataFrame(columns=["Country", "EdLevel", "YearsCodePro", "Salary"]))
+        _write_atomic(cube_output, cube.save)
+    if sketch_output is not None:
+        _write_atomic(sketch_output, sketches.save)
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows_read": rows_read,
+        "rows_written": rows_written,
+        "seconds": seconds,
+        "rows_per_s": rows_read / seconds if seconds > 0 else float("inf"),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _write_atomic(path, write):
+    # Write to a private temp file and rename, so concurrent workers never
+    # read a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def source_hash(path):
+    """sha256 of the source file, memoized by (size, mtime) so it is only rehashed on change"""
+    stat = os.stat(path)
+    memo_file = os.path.join(CACHE_DIR, "source_hashes.json")
+    memo = {}
+    if os.path.exists(memo_file):
+        try:
+            with open(memo_file, "r") as f:
+                memo = json.load(f)
+        except ValueError:
+            memo = {}
+
+    key = os.path.abspath(path)
+    entry = memo.get(key)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha.update(block)
+
+    memo[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha.hexdigest()}
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    def write(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump(memo, f, indent=2)
+    _write_atomic(memo_file, write)
+    return memo[key]["sha256"]
+
+
+def survey_path(year):
+    """Raw CSV of a survey year; 2020 falls back to the original top-level export"""
+    path = os.path.join(SURVEY_DIR, str(year), SURVEY_FILE)
+    if year == DEFAULT_YEAR and not os.path.exists(path):
+        return SURVEY_FILE
+    return path
+
+
+def available_years():
+    """Survey years that have a raw export on disk"""
+    return [year for year in sorted(YEAR_SCHEMAS) if os.path.exists(survey_path(year))]
+
+
+def partition_paths(year, source=None):
+    """Cleaned rows, salary cube and quantile sketches of one year, keyed by source content and cleaning version"""
+    key = f"{source_hash(source or survey_path(year))[:16]}-v{CLEANING_VERSION}"
+    directory = os.path.join(PARTITION_DIR, f"year={year}")
+    return (os.path.join(directory, f"clean-{key}.parquet"), os.path.join(directory, f"cube-{key}.parquet"),
+            os.path.join(directory, f"sketches-{key}.json"))
+
+
+def ensure_partition(year):
+    """Build the partition of a survey year unless it is already cached"""
+    paths = partition_paths(year)
+    if not all(os.path.exists(path) for path in paths):
+        clean, cube, sketches = paths
+        os.makedirs(os.path.dirname(clean), exist_ok=True)
+        ingest_survey(survey_path(year), clean, cube_output=cube, year=year, sketch_output=sketches)
+    return paths
+
+
+def load_partition(year):
+    """Cleaned rows of one survey year"""
+    clean, _, _ = ensure_partition(year)
+    return pd.read_parquet(clean)
+
+
+def load_partition_cube(year):
+    """Salary cube of one survey year"""
+    _, cube, _ = ensure_partition(year)
+    return SalaryCube.load(cube)
+
+
+def load_partition_sketches(year):
+    """Per-group salary quantile sketches of one survey year"""
+    _, _, sketches = ensure_partition(year)
+    return GroupSketches.load(sketches)
+
+
+def _downcast_lossless(values, dtype):
+    """values as dtype if that round-trips exactly, else unchanged"""
+    converted = values.astype(dtype)
+    if np.array_equal(converted.to_numpy(dtype=np.float64), values.to_numpy(dtype=np.float64), equal_nan=True):
+        return converted
+    return values
+
+
+def compact_frame(df):
+    """Categorical codes for the text columns and the narrowest exact numeric types"""
+    compact = pd.DataFrame({
+        "Country": df["Country"].astype("category"),
+        "EdLevel": df["EdLevel"].astype("category"),
+        # Experience comes in half-year steps and salaries in whole dollars,
+        # both exact in float32
+        "YearsCodePro": _downcast_lossless(df["YearsCodePro"], np.float32),
+        "Salary": _downcast_lossless(df["Salary"], np.float32),
+    })
+    if "Year" in df.columns:
+        compact["Year"] = df["Year"].astype(np.uint16)
+    return compact
+
+
+def load_clean_survey(years=(DEFAULT_YEAR,), compact=True):
+    """Cleaned rows of the given years only, with a Year column when more than one is loaded"""
+    if len(years) == 1:
+        df = load_partition(years[0])
+    else:
+        frames = [load_partition(year).assign(Year=year) for year in years]
+        df = pd.concat(frames, ignore_index=True)
+        del frames
+    # Convert once, after concatenating, so the categories are shared across years
+    return compact_frame(df) if compact else df
+
+
+def load_salary_cube(years=(DEFAULT_YEAR,)):
+    """Salary cube over the given years, merged from the per-year cubes"""
+    cube = None
+    for year in years:
+        part = load_partition_cube(year)
+        cube = part if cube is None else cube.merge(part)
+    return cube
+
+
+def load_salary_sketches(years=(DEFAULT_YEAR,)):
+    """Salary quantile sketches over the given years, merged from the per-year sketches"""
+    sketches = GroupSketches()
+    for year in years:
+        sketches.merge(load_partition_sketches(year))
+    return sketches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a survey CSV into a cleaned Parquet file")
+    parser.add_argument("csv", nargs="?", default=None, help="default: the export of --year")
+    parser.add_argument("--year", type=int, default=DEFAULT_YEAR, choices=sorted(YEAR_SCHEMAS))
+    parser.add_argument("--output", default=None, help="default: the partition of --year in data_cache")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    csv = args.csv or survey_path(args.year)
+    if args.output:
+        base = os.path.splitext(args.output)[0]
+        output, cube_output, sketch_output = args.output, f"{base}-cube.parquet", f"{base}-sketches.json"
+    else:
+        output, cube_output, sketch_output = partition_paths(args.year, csv)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    stats = ingest_survey(csv, output, chunksize=args.chunksize, cube_output=cube_output, year=args.year,
+                          sketch_output=sketch_output)
+    print(f"Read {stats['rows_read']:,} rows, wrote {stats['rows_written']:,} to {output} (cube: {cube_output})")
+    print(f"{stats['seconds']:.2f} s, {stats['rows_per_s']:,.0f} rows/s, peak RSS {stats['peak_rss_mb']:.0f} MB")
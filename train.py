@@ -0,0 +1,338 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import GridSearchCV
+from sklearn.preprocessing import LabelEncoder
+from sklearn.tree import DecisionTreeRegressor
+
+from model_bundle import BUNDLE_DIR, save_bundle
+from model_distillation import compress
+from model_search import FAMILIES, SEARCH_SPACES, candidates, make_model, successive_halving
+import out_of_core
+from salary_model import MODEL_FILE
+from survey_data import (CACHE_DIR, CLEANING_VERSION, COUNTRY_CUTOFF, DEFAULT_YEAR, SURVEY_COLUMNS, SURVEY_DTYPES,
+                         YEAR_SCHEMAS, clean_survey, ensure_partition, load_salary_cube, normalize_chunk,
+                         partition_paths, source_hash, survey_path)
+from tree_engine import leaf_quantiles
+
+# Stage outputs are cached here, one file per stage and content key
+TRAIN_CACHE_DIR = os.path.join(CACHE_DIR, "train")
+# Bump when a stage changes its output, so cached outputs are not reused
+PIPELINE_VERSION = 1
+# Grid and folds of the notebook's GridSearchCV
+MAX_DEPTH_GRID = [None, 2, 4, 6, 8, 10, 12]
+# "grid" is the notebook's search, "halving" the parallel budgeted one over a wider space
+SEARCH_MODES = ("grid", "halving")
+CV_FOLDS = 5
+RANDOM_STATE = 0
+
+
+def stage_key(stage, inputs):
+    """Content address of a stage output: the stage, the pipeline version and every input"""
+    payload = json.dumps({"stage": stage, "version": PIPELINE_VERSION, "inputs": inputs}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class StageCache:
+    def __init__(self, directory=TRAIN_CACHE_DIR, force=False):
+        """On-disk cache of stage outputs that also times every stage run through it"""
+        self.directory = directory
+        self.force = force
+        self.timings = []
+        self._timed_seconds = 0.0
+
+    def path(self, stage, key):
+        return os.path.join(self.directory, f"{stage}-{key}.pkl")
+
+    def run(self, stage, inputs, compute, cacheable=None):
+        """(key, output) of a stage, loaded from the cache or computed and stored
+
+        compute may itself run upstream stages; their time is not counted
+        against this one. Outputs for which cacheable returns False are not
+        stored, as they do not follow from the inputs alone.
+        """
+        key = stage_key(stage, inputs)
+        path = self.path(stage, key)
+        start = time.perf_counter()
+        timed_before = self._timed_seconds
+        cached = os.path.exists(path) and not self.force
+        if cached:
+            with open(path, "rb") as f:
+                output = pickle.load(f)
+        else:
+            output = compute()
+            if cacheable is None or cacheable(output):
+                os.makedirs(self.directory, exist_ok=True)
+                # Private temp file and rename, so concurrent runs never read a partial file
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+        self.record(stage, key, time.perf_counter() - start - (self._timed_seconds - timed_before), cached)
+        return key, output
+
+    def record(self, stage, key, seconds, cached=False):
+        self.timings.append({"stage": stage, "key": key, "seconds": seconds, "cached": cached})
+        self._timed_seconds += seconds
+
+
+def ingest(path, year):
+    """The needed raw columns of one survey export, renamed to the canonical schema"""
+    schema = YEAR_SCHEMAS[year]
+    columns = schema["columns"]
+    df = pd.read_csv(
+        path,
+        usecols=[columns[column] for column in SURVEY_COLUMNS],
+        dtype={columns[column]: dtype for column, dtype in SURVEY_DTYPES.items()},
+    )
+    return normalize_chunk(df, schema)[SURVEY_COLUMNS]
+
+
+def clean(frames):
+    """Clean every year on its own (the country cutoff is per survey) and stack them"""
+    return pd.concat([clean_survey(df) for df in frames], ignore_index=True)
+
+
+def encode(df):
+    """Label-encode Country and EdLevel into the model's feature matrix"""
+    le_country = LabelEncoder()
+    le_education = LabelEncoder()
+    X = np.column_stack([
+        le_country.fit_transform(df["Country"]),
+        le_education.fit_transform(df["EdLevel"]),
+        df["YearsCodePro"].to_numpy(dtype=float),
+    ]).astype(float)
+    return {"X": X, "y": df["Salary"].to_numpy(dtype=float), "le_country": le_country, "le_education": le_education}
+
+
+def search(X, y, max_depth=None, cv=CV_FOLDS, mode="grid", families=("tree",), budget=None, n_jobs=None):
+    """Best model family and parameters by cross-validated MSE"""
+    if mode == "grid":
+        gs = GridSearchCV(DecisionTreeRegressor(random_state=RANDOM_STATE), {"max_depth": max_depth or MAX_DEPTH_GRID},
+                          scoring="neg_mean_squared_error", cv=cv, n_jobs=n_jobs)
+        gs.fit(X, y)
+        return {"family": "tree", "best_params": gs.best_params_, "cv_rmse": float(np.sqrt(-gs.best_score_))}
+    if mode != "halving":
+        raise ValueError(f"Unknown search mode {mode!r}, expected one of {SEARCH_MODES}")
+    # An explicit max_depth grid replaces the tree family's default one
+    spaces = {"tree": dict(SEARCH_SPACES["tree"], max_depth=list(max_depth))} if max_depth else None
+    return successive_halving(X, y, candidates(families, spaces), cv=cv, budget=budget, n_jobs=n_jobs,
+                              random_state=RANDOM_STATE)
+
+
+def fit(X, y, family, params):
+    """Fit the final model on every row; trees also get the salary quantiles of each leaf"""
+    regressor = make_model(family, params, RANDOM_STATE)
+    regressor.fit(X, y)
+    fitted = {
+        "family": family,
+        "model": regressor,
+        "train_rmse": float(np.sqrt(mean_squared_error(y, regressor.predict(X)))),
+    }
+    if family == "tree":
+        fitted["leaf_quantiles"] = leaf_quantiles(regressor.apply(X), y, regressor.tree_.node_count)
+    return fitted
+
+
+def export(fitted, encoded, model_file, bundle, metadata):
+    """Write the pickle and the bundle the app loads"""
+    if fitted["family"] != "tree":
+        raise ValueError(f"Only a decision tree can be exported to the app's bundle, not a {fitted['family']} model; "
+                         f"use --distill to compress it into one")
+    data = {"model": fitted["model"], "le_country": encoded["le_country"], "le_education": encoded["le_education"],
+            "leaf_quantiles": fitted["leaf_quantiles"]}
+    tmp_path = f"{model_file}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        pickle.dump(data, file)
+    os.replace(tmp_path, model_file)
+    save_bundle(bundle, fitted["model"], encoded["le_country"], encoded["le_education"],
+                extra_arrays={"leaf_quantiles": fitted["leaf_quantiles"]}, metadata=metadata)
+
+
+def train(years=(DEFAULT_YEAR,), max_depth=None, cv=CV_FOLDS, model_file=MODEL_FILE, bundle=BUNDLE_DIR,
+          cache=None, search_mode="grid", families=("tree",), budget=None, n_jobs=None, teacher=None, distill=False,
+          max_leaf_nodes=None, latency_us=None):
+    """Run ingest -> clean -> encode -> search -> fit [-> compress] -> export, reusing every cached stage
+
+    teacher skips the search and fits that family with default parameters;
+    distill compresses the fitted model into a tree of max_leaf_nodes leaves,
+    or of as many as predict within latency_us per row.
+    """
+    cache = cache or StageCache()
+    families = list(families) if search_mode == "halving" else ["tree"]
+    compressed = distill or max_leaf_nodes or latency_us
+    # Only a tree can be exported, so fail now rather than after the search picks another family
+    if not compressed and set([teacher] if teacher else families) != {"tree"}:
+        raise ValueError("Forests and boosted models cannot be exported to the app's bundle; "
+                         "use --distill to compress them into a decision tree")
+
+    # Upstream stages are only loaded when a downstream stage has to be computed
+    ingest_inputs = [{"source": source_hash(survey_path(year)), "year": year} for year in years]
+    clean_inputs = {"ingest": [stage_key("ingest", inputs) for inputs in ingest_inputs],
+                    "cleaning_version": CLEANING_VERSION, "country_cutoff": COUNTRY_CUTOFF}
+
+    def ingested():
+        return [cache.run("ingest", inputs, lambda inputs=inputs: ingest(survey_path(inputs["year"]), inputs["year"]))[1]
+                for inputs in ingest_inputs]
+
+    def cleaned():
+        return cache.run("clean", clean_inputs, lambda: clean(ingested()))[1]
+
+    encode_key, encoded = cache.run("encode", {"clean": stage_key("clean", clean_inputs)}, lambda: encode(cleaned()))
+    X, y = encoded["X"], encoded["y"]
+
+    max_depth = list(max_depth) if max_depth else None
+    if teacher:
+        searched = {"family": teacher, "best_params": {}, "cv_rmse": None}
+    else:
+        # The worker count does not change the result, so it is not part of the key
+        _, searched = cache.run("search", {"encode": encode_key, "mode": search_mode, "max_depth": max_depth,
+                                           "families": families, "cv": cv, "budget": budget,
+                                           "random_state": RANDOM_STATE},
+                                lambda: search(X, y, max_depth, cv, search_mode, families, budget, n_jobs),
+                                # Where a budget stops the search depends on the machine and its load
+                                cacheable=lambda searched: not searched.get("timed_out"))
+    # Keyed by the chosen model, so a different search with the same winner reuses the fit
+    fit_key, fitted = cache.run("fit", {"encode": encode_key, "family": searched["family"],
+                                        "params": searched["best_params"], "random_state": RANDOM_STATE},
+                                lambda: fit(X, y, searched["family"], searched["best_params"]))
+    metadata = {"training_key": fit_key, "years": list(years), "family": searched["family"],
+                "params": searched["best_params"]}
+
+    if compressed:
+        teacher_fitted = fitted
+        fit_key, fitted = cache.run("compress", {"fit": fit_key, "max_leaf_nodes": max_leaf_nodes,
+                                                 "latency_us": latency_us, "random_state": RANDOM_STATE},
+                                    lambda: compress(teacher_fitted, X, y, max_leaf_nodes, latency_us, RANDOM_STATE),
+                                    # A latency budget's leaf count is timed on this machine under its current load
+                                    cacheable=lambda compressed_fit: latency_us is None)
+        metadata.update(training_key=fit_key, distillation=fitted["distillation"])
+
+    start = time.perf_counter()
+    export(fitted, encoded, model_file, bundle, metadata)
+    cache.record("export", fit_key, time.perf_counter() - start)
+
+    return {"rows": len(y), "search": searched, "family": searched["family"], "best_params": searched["best_params"],
+            "cv_rmse": searched["cv_rmse"], "train_rmse": fitted["train_rmse"],
+            "distillation": fitted.get("distillation"), "timings": cache.timings}
+
+
+def train_out_of_core(years=(DEFAULT_YEAR,), max_depth=None, cv=CV_FOLDS, model_file=MODEL_FILE, bundle=BUNDLE_DIR,
+                      cache=None):
+    """Same stages with bounded memory: streamed partitions -> per-cell statistics -> tree on the cells"""
+    cache = cache or StageCache()
+    max_depth = list(max_depth) if max_depth else MAX_DEPTH_GRID
+
+    # The streaming ingestion of survey_data caches its partitions itself
+    clean_paths = []
+    for year in years:
+        start = time.perf_counter()
+        paths = partition_paths(year)
+        cached = all(os.path.exists(path) for path in paths)
+        clean_paths.append(ensure_partition(year)[0])
+        cache.record("clean", os.path.basename(clean_paths[-1]).split("-")[1], time.perf_counter() - start, cached)
+
+    # Partition file names carry the source hash and the cleaning version
+    aggregate_key, stats = cache.run("aggregate", {"partitions": [os.path.basename(path) for path in clean_paths],
+                                                   "years": list(years), "folds": cv, "random_state": RANDOM_STATE},
+                                     lambda: out_of_core.aggregate(clean_paths, cv, random_state=RANDOM_STATE))
+    _, (le_country, le_education) = cache.run("encode", {"aggregate": aggregate_key},
+                                              lambda: out_of_core.fit_encoders(stats))
+    encoded = {"le_country": le_country, "le_education": le_education}
+
+    _, searched = cache.run("search", {"aggregate": aggregate_key, "mode": "cells", "max_depth": max_depth,
+                                       "random_state": RANDOM_STATE},
+                            lambda: out_of_core.search_cells(stats, le_country, le_education, max_depth,
+                                                             RANDOM_STATE))
+
+    def fit_cells():
+        cells = out_of_core.cells_of(stats)
+        model = out_of_core.fit_cells(cells, le_country, le_education, searched["best_params"], RANDOM_STATE)
+        return {
+            "family": "tree",
+            "model": model,
+            # Leaf intervals come from the salary histograms of the (also streamed) partition cubes
+            "leaf_quantiles": out_of_core.cube_leaf_quantiles(model, load_salary_cube(years), le_country,
+                                                              le_education),
+            "train_rmse": float(np.sqrt(out_of_core.squared_error(model, cells, le_country, le_education)
+                                        / cells["count"].sum())),
+        }
+
+    fit_key, fitted = cache.run("fit", {"aggregate": aggregate_key, "mode": "cells",
+                                        "params": searched["best_params"], "random_state": RANDOM_STATE},
+                                fit_cells)
+
+    start = time.perf_counter()
+    metadata = {"training_key": fit_key, "years": list(years), "family": "tree", "params": searched["best_params"],
+                "out_of_core": True}
+    export(fitted, encoded, model_file, bundle, metadata)
+    cache.record("export", fit_key, time.perf_counter() - start)
+
+    return {"rows": int(stats["count"].sum()), "search": searched, "family": "tree",
+            "best_params": searched["best_params"], "cv_rmse": searched["cv_rmse"],
+            "train_rmse": fitted["train_rmse"], "timings": cache.timings}
+
+
+def max_depth_value(value):
+    return None if value.lower() == "none" else int(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the salary model and export it for the app")
+    parser.add_argument("--year", type=int, nargs="+", default=[DEFAULT_YEAR], choices=sorted(YEAR_SCHEMAS))
+    parser.add_argument("--max-depth", type=max_depth_value, nargs="+", default=None,
+                        help="max_depth grid; 'none' for unlimited")
+    parser.add_argument("--cv", type=int, default=CV_FOLDS)
+    parser.add_argument("--search", choices=SEARCH_MODES, default="grid")
+    parser.add_argument("--families", nargs="+", choices=sorted(FAMILIES), default=["tree"],
+                        help="model families searched by --search halving")
+    parser.add_argument("--budget", type=float, default=None, help="wall-clock seconds for --search halving")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores for halving)")
+    parser.add_argument("--model-file", default=MODEL_FILE)
+    parser.add_argument("--bundle", default=BUNDLE_DIR)
+    parser.add_argument("--cache-dir", default=TRAIN_CACHE_DIR)
+    parser.add_argument("--force", action="store_true", help="recompute every stage")
+    parser.add_argument("--teacher", choices=sorted(FAMILIES), default=None,
+                        help="skip the search and fit this family with default parameters")
+    parser.add_argument("--distill", action="store_true", help="compress the fitted model into a decision tree")
+    parser.add_argument("--leaves", type=int, default=None, help="leaf count of the distilled tree")
+    parser.add_argument("--latency-us", type=float, default=None,
+                        help="distill to the most leaves that predict within this many µs per row")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="stream the survey partitions instead of loading every row (max_depth grid only)")
+    args = parser.parse_args()
+
+    years = tuple(sorted(set(args.year)))
+    cache = StageCache(args.cache_dir, force=args.force)
+    if args.out_of_core:
+        result = train_out_of_core(years, args.max_depth, args.cv, args.model_file, args.bundle, cache)
+    else:
+        result = train(years, args.max_depth, args.cv, args.model_file, args.bundle, cache, args.search,
+                       args.families, args.budget, args.jobs, args.teacher, args.distill, args.leaves,
+                       args.latency_us)
+
+    for timing in result["timings"]:
+        status = "cached" if timing["cached"] else "ran"
+        print(f"{timing['stage']:<9} {timing['key']}  {timing['seconds']:8.2f} s  {status}")
+    print(f"Total {sum(timing['seconds'] for timing in result['timings']):.2f} s")
+    for i, search_round in enumerate(result["search"].get("rounds", [])):
+        print(f"Round {i + 1}: {search_round['candidates']} candidates on {search_round['rows']:,} rows, "
+              f"{search_round['fits']} fits in {search_round['seconds']:.2f} s"
+              f"{'' if search_round['complete'] else ' (stopped by the budget)'}")
+    cv_rmse = "n/a" if result["cv_rmse"] is None else f"${result['cv_rmse']:,.02f}"
+    print(f"{result['rows']:,} rows, best {result['family']} {result['best_params']}, "
+          f"CV RMSE {cv_rmse}, training RMSE ${result['train_rmse']:,.02f}")
+    report = result.get("distillation")
+    if report:
+        print(f"Distilled {report['teacher']} into a tree with {report['leaves']} leaves, "
+              f"{report['latency_us']:.2f} µs per row")
+        print(f"Holdout RMSE ${report['teacher_holdout_rmse']:,.02f} -> ${report['student_holdout_rmse']:,.02f} "
+              f"(accuracy lost ${report['accuracy_lost']:,.02f}), fidelity RMSE ${report['fidelity_rmse']:,.02f}")
+    print(f"Wrote {args.model_file} and {args.bundle}")
@@ -0,0 +1,79 @@
+import numpy as np
+
+# Child index scikit-learn uses to mark a leaf
+LEAF = -1
+# Salary quantiles recorded per leaf for prediction intervals
+QUANTILES = (0.1, 0.5, 0.9)
+
+
+def export_tree(regressor):
+    """Export a fitted DecisionTreeRegressor to flat NumPy arrays"""
+    tree = regressor.tree_
+    left = tree.children_left.astype(np.int32)
+    is_leaf = left == LEAF
+    return {
+        # Leaves get feature 0 so the traversal can index X without masking
+        "feature": np.where(is_leaf, 0, tree.feature).astype(np.int32),
+        "threshold": tree.threshold.astype(np.float64),
+        "left": left,
+        "right": tree.children_right.astype(np.int32),
+        "value": tree.value[:, 0, 0].astype(np.float64),
+        "max_depth": np.int32(tree.max_depth),
+    }
+
+
+def apply_tree(tree, X):
+    """Return the leaf index reached by every row of X"""
+    # scikit-learn compares float32 features against float64 thresholds;
+    # casting the same way keeps the split decisions bit-identical
+    X = np.asarray(X, dtype=np.float32)
+    rows = np.arange(len(X))
+    node = np.zeros(len(X), dtype=np.int32)
+    feature, threshold = tree["feature"], tree["threshold"]
+    left, right = tree["left"], tree["right"]
+
+    # Advance every row one level per pass; rows already in a leaf stay put
+    for _ in range(int(tree["max_depth"])):
+        next_left = left[node]
+        active = next_left != LEAF
+        if not active.any():
+            break
+        go_left = X[rows, feature[node]] <= threshold[node]
+        node = np.where(active, np.where(go_left, next_left, right[node]), node)
+    return node
+
+
+def predict_tree(tree, X):
+    """Predict a whole batch with the exported tree"""
+    return tree["value"][apply_tree(tree, X)]
+
+
+def leaf_quantiles(leaves, y, n_nodes, quantiles=QUANTILES):
+    """Quantiles of the training targets that fall in each leaf, indexed by node id"""
+    leaves = np.asarray(leaves)
+    y = np.asarray(y, dtype=np.float64)
+    order = np.lexsort((y, leaves))
+    sorted_leaves, sorted_y = leaves[order], y[order]
+    nodes, starts, counts = np.unique(sorted_leaves, return_index=True, return_counts=True)
+
+    # Same linear interpolation as np.quantile, for every leaf at once;
+    # internal nodes keep NaN
+    result = np.full((n_nodes, len(quantiles)), np.nan)
+    for k, q in enumerate(quantiles):
+        position = starts + q * (counts - 1)
+        lower = np.floor(position).astype(np.intp)
+        upper = np.ceil(position).astype(np.intp)
+        result[nodes, k] = sorted_y[lower] + (sorted_y[upper] - sorted_y[lower]) * (position - lower)
+    return result
+
+
+class TreeModel:
+    def __init__(self, tree):
+        """Estimator-like wrapper so exported trees drop in where the regressor was used"""
+        self.tree = tree
+
+    def apply(self, X):
+        return apply_tree(self.tree, X)
+
+    def predict(self, X):
+        return predict_tree(self.tree, X)